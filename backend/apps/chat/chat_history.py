@@ -5,14 +5,26 @@ All methods are resilient - failures are logged but don't block the main flow.
 """
 
 import logging
+import time
 from typing import Any
 
 from config import Settings
 from db import FirestoreService
 from llm import LLMService as LLMClient
+from llm.prompts import CHAT_SUMMARY_PROMPT, CHAT_SUMMARY_SYSTEM_PROMPT
 
 logger = logging.getLogger(__name__)
 
+# Display labels for stored message roles (used in summary transcripts)
+_ROLE_LABEL = {"user": "User", "assistant": "Assistant", "system": "System"}
+
+# Max chats whose message count is tracked in memory (oldest evicted first)
+_MAX_TRACKED_CHATS = 10000
+
+# How long a tracked count is trusted before being re-read. Other replicas
+# save messages this process never sees, so the estimate drifts over time.
+_MESSAGE_COUNT_TTL_SECONDS = 30.0
+
 
 class ChatHistoryManager:
     """Manages chat history persistence and context building.
@@ -31,6 +43,10 @@ class ChatHistoryManager:
         self.firestore = firestore_service
         self.llm_client = llm_client
         self.settings = settings
+        # Per-chat (message count, expiry), seeded from Firestore by the
+        # summary check and bumped on each save - lets most checks skip the
+        # count RPC until the entry expires
+        self._message_counts: dict[str, tuple[int, float]] = {}
 
     async def get_context(self, chat_id: str) -> str:
         """Get formatted chat history context for a chat.
@@ -59,12 +75,14 @@ class ChatHistoryManager:
             return
 
         try:
-            await self.firestore.add_message(
+            # Message + chat activity commit together in one batch write
+            await self.firestore.add_message_and_touch(
                 chat_id=chat_id,
                 role="user",
                 content=content,
+                first_message=content,
             )
-            await self.firestore.update_chat_activity(chat_id, first_message=content)
+            self._bump_message_count(chat_id)
         except Exception as e:
             logger.warning("Failed to save user message for %s: %s", chat_id, e)
 
@@ -88,6 +106,7 @@ class ChatHistoryManager:
                 content=content,
                 sources=sources,
             )
+            self._bump_message_count(chat_id)
         except Exception as e:
             logger.warning("Failed to save assistant message for %s: %s", chat_id, e)
 
@@ -99,12 +118,18 @@ class ChatHistoryManager:
         if not self.firestore:
             return
 
+        # Cheap pre-filter: skip the count RPC when a fresh estimate says not due
+        entry = self._message_counts.get(chat_id)
+        if entry is not None:
+            estimate, expires_at = entry
+            if expires_at > time.monotonic() and not self._summary_due(estimate):
+                return
+
         try:
             message_count = await self.firestore.get_message_count(chat_id)
-            threshold = self.settings.summary_trigger_threshold
-            interval = self.settings.summary_trigger_interval
+            self._track_message_count(chat_id, message_count)
 
-            if message_count > threshold and message_count % interval == 1:
+            if self._summary_due(message_count):
                 logger.info(
                     "Generating summary for chat %s (%d messages)",
                     chat_id,
@@ -116,20 +141,14 @@ class ChatHistoryManager:
                     return
 
                 conversation_text = "\n".join(
-                    f"{msg['role'].capitalize()}: {msg['content'][:300]}"
+                    f"{_ROLE_LABEL.get(msg['role'], msg['role'].capitalize())}: "
+                    f"{msg['content'][:300]}"
                     for msg in messages
                 )
 
-                summary_prompt = f"""Summarize this conversation concisely (2-3 sentences max).
-
-CONVERSATION:
-{conversation_text}
-
-SUMMARY:"""
-
                 summary = await self.llm_client.generate(
-                    prompt=summary_prompt,
-                    system="You are a helpful assistant that summarizes conversations.",
+                    prompt=CHAT_SUMMARY_PROMPT.format(conversation=conversation_text),
+                    system=CHAT_SUMMARY_SYSTEM_PROMPT,
                     temperature=0.3,
                     max_tokens=200,
                 )
@@ -139,3 +158,37 @@ SUMMARY:"""
 
         except Exception as e:
             logger.warning("Failed to generate summary for %s: %s", chat_id, e)
+
+    def _summary_due(self, message_count: int) -> bool:
+        """Check whether a chat with this many messages needs a new summary."""
+        return (
+            message_count > self.settings.summary_trigger_threshold
+            and message_count % self.settings.summary_trigger_interval == 1
+        )
+
+    def _track_message_count(self, chat_id: str, count: int) -> None:
+        """Record the authoritative message count for a chat."""
+        if chat_id not in self._message_counts and (
+            len(self._message_counts) >= _MAX_TRACKED_CHATS
+        ):
+            del self._message_counts[next(iter(self._message_counts))]
+        self._message_counts[chat_id] = (
+            count,
+            time.monotonic() + _MESSAGE_COUNT_TTL_SECONDS,
+        )
+
+    def forget_chat(self, chat_id: str) -> None:
+        """Drop the tracked message count when a chat is cleared or deleted.
+
+        The next summary check then re-reads the count from Firestore.
+        """
+        self._message_counts.pop(chat_id, None)
+
+    def _bump_message_count(self, chat_id: str) -> None:
+        """Increment the tracked count after a successful save (if tracked).
+
+        The expiry is kept: only a Firestore read refreshes it.
+        """
+        entry = self._message_counts.get(chat_id)
+        if entry is not None:
+            self._message_counts[chat_id] = (entry[0] + 1, entry[1])
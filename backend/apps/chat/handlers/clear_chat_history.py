@@ -1,12 +1,13 @@
 """DELETE /chat/history - Clear chat history for a chat."""
 
 import logging
-import uuid
+import secrets
 
 from fastapi import Query
 from fastapi.responses import JSONResponse
 
 from db import get_firestore_service
+from dependencies import get_chat_history_manager
 from responses import ResponseCode, error_response, success_response
 
 logger = logging.getLogger(__name__)
@@ -16,10 +17,12 @@ async def clear_chat_history(
     chat_id: str = Query(..., description="Chat ID to clear"),
 ) -> JSONResponse:
     """Clear chat history for a specific chat."""
-    request_id = str(uuid.uuid4())[:8]
+    request_id = secrets.token_hex(4)
     logger.info("[%s] Clear chat history for chat: %s", request_id, chat_id)
 
     firestore_service = get_firestore_service()
+    # Drop the cached message count so the summary schedule re-reads it
+    get_chat_history_manager().forget_chat(chat_id)
 
     try:
         deleted_count = await firestore_service.clear_history(chat_id)
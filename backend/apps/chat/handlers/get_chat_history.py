@@ -1,8 +1,9 @@
 """GET /chat/history - Get chat history for a chat."""
 
 import logging
+from typing import Any
 
-from fastapi import HTTPException, Query
+from fastapi import HTTPException, Query, Response
 from pydantic import BaseModel, Field
 
 from db import get_firestore_service
@@ -40,8 +41,39 @@ class ChatHistoryResponse(BaseModel):
     """Response for chat history endpoint."""
 
     messages: list[ChatHistoryMessage]
-    total_count: int = Field(..., description="Total message count")
-    has_more: bool = Field(default=False, description="Whether there are more messages")
+    total_count: int | None = Field(
+        None, description="Deprecated: no longer computed (use has_more)"
+    )
+    has_more: bool = Field(
+        default=False, description="Whether there are older messages"
+    )
+
+
+def build_history_message(msg: dict[str, Any]) -> ChatHistoryMessage:
+    """Build a history message from a stored Firestore message dict.
+
+    Data comes straight from our own store, so per-field validation is
+    skipped with model_construct.
+    """
+    sources = msg.get("sources")
+    return ChatHistoryMessage.model_construct(
+        id=msg.get("id", ""),
+        role=msg.get("role", ""),
+        content=msg.get("content", ""),
+        timestamp=msg.get("timestamp", ""),
+        sources=[
+            SourcePassage.model_construct(
+                text=s.get("text", ""),
+                filename=s.get("filename", ""),
+                page_number=s.get("page_number"),
+                chunk_index=s.get("chunk_index", 0),
+                relevance_score=s.get("relevance_score", 0.0),
+            )
+            for s in sources
+        ]
+        if sources
+        else None,
+    )
 
 
 # --- Handler ---
@@ -49,41 +81,39 @@ class ChatHistoryResponse(BaseModel):
 
 async def get_chat_history(
     chat_id: str = Query(..., description="Chat ID"),
-    limit: int = Query(default=50, description="Max messages to return"),
-) -> ChatHistoryResponse:
-    """Get chat history for a specific chat."""
+    limit: int = Query(default=50, ge=1, le=500, description="Max messages to return"),
+    before: str | None = Query(
+        default=None, description="Message ID cursor: return older messages"
+    ),
+) -> Response:
+    """Get chat history for a specific chat.
+
+    Pages backwards from the newest message. To load older messages, pass
+    the ID of the oldest message received as `before`.
+    """
     firestore_service = get_firestore_service()
 
     try:
-        messages = await firestore_service.get_messages(chat_id, limit=limit)
-        total_count = await firestore_service.get_message_count(chat_id)
-
-        history_messages = [
-            ChatHistoryMessage(
-                id=msg.get("id", ""),
-                role=msg.get("role", ""),
-                content=msg.get("content", ""),
-                timestamp=msg.get("timestamp", ""),
-                sources=[
-                    SourcePassage(
-                        text=s.get("text", ""),
-                        filename=s.get("filename", ""),
-                        page_number=s.get("page_number"),
-                        chunk_index=s.get("chunk_index", 0),
-                        relevance_score=s.get("relevance_score", 0.0),
-                    )
-                    for s in msg["sources"]
-                ]
-                if msg.get("sources")
-                else None,
-            )
-            for msg in messages
-        ]
+        # Over-fetch by one to learn whether older messages exist, instead
+        # of counting the whole subcollection
+        messages = await firestore_service.get_messages(
+            chat_id, limit=limit + 1, before=before
+        )
+        has_more = len(messages) > limit
+        if has_more:
+            messages = messages[1:]  # oldest first - drop the extra one
+
+        history_messages = [build_history_message(msg) for msg in messages]
 
-        return ChatHistoryResponse(
+        response = ChatHistoryResponse(
             messages=history_messages,
-            total_count=total_count,
-            has_more=total_count > limit,
+            has_more=has_more,
+        )
+        # Serialize once in pydantic-core; returning a Response skips FastAPI's
+        # jsonable_encoder pass (the route's response_model still documents it)
+        return Response(
+            content=response.model_dump_json(),
+            media_type="application/json",
         )
 
     except Exception as e:
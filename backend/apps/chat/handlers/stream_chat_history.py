@@ -0,0 +1,51 @@
+"""GET /chat/history/stream - Stream chat history as NDJSON."""
+
+import logging
+from collections.abc import AsyncGenerator
+
+from fastapi import Query
+from fastapi.responses import StreamingResponse
+from pydantic_core import to_json
+
+from apps.chat.handlers.get_chat_history import build_history_message
+from db import get_firestore_service
+
+logger = logging.getLogger(__name__)
+
+
+async def stream_chat_history(
+    chat_id: str = Query(..., description="Chat ID"),
+    limit: int | None = Query(
+        default=None, ge=1, le=10000, description="Max messages to stream"
+    ),
+    after: str | None = Query(
+        default=None, description="Message ID cursor: stream newer messages"
+    ),
+) -> StreamingResponse:
+    """Stream chat history, oldest first, one JSON message per line.
+
+    Meant for long histories: messages are serialized as they are read
+    from Firestore, so server memory stays bounded regardless of size.
+    Each line has the same shape as a message from GET /chat/history. If
+    reading fails partway, a final {"type": "error", ...} line is written so
+    clients can tell a truncated history from a complete one.
+    """
+    firestore_service = get_firestore_service()
+
+    async def generate_ndjson() -> AsyncGenerator[bytes, None]:
+        try:
+            async for msg in firestore_service.stream_messages(
+                chat_id, limit=limit, after=after
+            ):
+                yield to_json(build_history_message(msg)) + b"\n"
+        except Exception as e:
+            # Headers are already sent - mark the body as truncated instead.
+            # (Firestore failures are already logged by stream_messages.)
+            yield (
+                to_json(
+                    {"type": "error", "error": f"Failed to stream chat history: {e}"}
+                )
+                + b"\n"
+            )
+
+    return StreamingResponse(generate_ndjson(), media_type="application/x-ndjson")
@@ -5,17 +5,23 @@ Orchestrates the chat flow:
 2. Analyze query (skip RAG? decompose?)
 3. Route to RAG or general response
 4. Stream response
-5. Save to chat history
+5. Save to chat history (in the background, off the response path)
 """
 
 import asyncio
-import json
+import hashlib
 import logging
+import re
+import secrets
+import time
 import uuid
-from collections.abc import AsyncGenerator
+from collections.abc import AsyncGenerator, AsyncIterator, Coroutine
+from contextlib import aclosing, asynccontextmanager
 from dataclasses import dataclass
+from functools import lru_cache
 from typing import Any
 
+import orjson
 from anthropic import APITimeoutError
 from fastapi import Cookie, Depends
 from fastapi.responses import StreamingResponse
@@ -23,15 +29,15 @@ from pydantic import BaseModel, Field
 
 from apps.chat.chat_history import ChatHistoryManager
 from config import get_settings
-from dependencies import get_chat_history_manager, get_rag_service
-from llm import LLMService
+from dependencies import get_chat_history_manager, get_llm_service, get_rag_service
 from llm.prompts import (
+    ASSISTANT_PROMPT,
     ASSISTANT_SYSTEM_PROMPT,
     QUERY_ANALYSIS_PROMPT,
     QUERY_ANALYSIS_SCHEMA,
     QUERY_ANALYSIS_SYSTEM_PROMPT,
 )
-from services import RAGService
+from services import RAGService, RetrievedChunk
 
 logger = logging.getLogger(__name__)
 
@@ -59,10 +65,49 @@ class ChatRequest(BaseModel):
     )
 
 
+# --- Greeting Detection ---
+
+# Whole-message greetings, tolerating trailing punctuation ("thanks!", "hi?")
+_GREETING_RE = re.compile(
+    r"(?:hi|hello|hey|help|thanks?|thank\s+you|\?)[!.?\s]*", re.IGNORECASE
+)
+
+
+def _is_greeting(message: str) -> bool:
+    """Check if a message is a simple greeting (no analysis or RAG needed)."""
+    return _GREETING_RE.fullmatch(message.strip()) is not None
+
+
 # --- Query Analyzer (private to this handler) ---
 
+# Messages that clearly ask about the uploaded documents go straight to RAG...
+_RAG_HINTS = re.compile(
+    r"\b(document|doc|page|section|chapter|pdf|file|report)s?\b", re.IGNORECASE
+)
+# ...unless they may span several documents (decomposition) or ask about the
+# uploads themselves (meta questions) - the LLM analyzer decides those
+_ANALYSIS_HINTS = re.compile(
+    r"\b(compare|comparison|versus|vs|differ\w*|both|between|all|each"
+    r"|upload\w*|how many|list|which|what (?:documents|docs|files))\b",
+    re.IGNORECASE,
+)
+
+# Output budget for the analysis tool call: a fixed allowance for the flags and
+# reasoning, plus room for one short sub-query per document (capped). Output
+# that hits the limit is treated as a failed analysis (and never cached).
+_ANALYSIS_BASE_TOKENS = 150
+_ANALYSIS_TOKENS_PER_SUB_QUERY = 40
+_ANALYSIS_MAX_TOKENS = 500
 
-@dataclass
+
+@lru_cache(maxsize=256)
+def _documents_section(document_names: tuple[str, ...]) -> str:
+    """Format the analysis prompt's document list (cached per session's docs)."""
+    docs_list = "\n".join(f"- {name}" for name in document_names)
+    return f"\n\nAvailable documents:\n{docs_list}"
+
+
+@dataclass(slots=True, frozen=True)
 class _QueryAnalysis:
     """Result of query analysis."""
 
@@ -72,15 +117,57 @@ class _QueryAnalysis:
     reasoning: str = ""
 
 
+# Repeated questions in the same conversation state reuse the routing decision
+_ANALYSIS_CACHE_SIZE = 1024
+_ANALYSIS_CACHE_TTL_SECONDS = 600.0
+
+
+class _AnalysisCache:
+    """Small in-memory TTL cache for query analysis results."""
+
+    def __init__(self, max_size: int, ttl: float) -> None:
+        self._cache: dict[bytes, tuple[float, _QueryAnalysis]] = {}
+        self.max_size = max_size
+        self.ttl = ttl
+
+    @staticmethod
+    def key(message: str, chat_history: str, document_names: list[str]) -> bytes:
+        """Build a cache key from exactly what the analysis prompt sees.
+
+        The analyzer is shared by every chat, so history is part of the key:
+        a follow-up like "why?" routes differently from one chat to the next.
+        """
+        raw = "\x1f".join((message, chat_history, *document_names))
+        return hashlib.blake2b(raw.encode(), digest_size=16).digest()
+
+    def get(self, key: bytes) -> _QueryAnalysis | None:
+        """Get a cached analysis if present and not expired."""
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        expires_at, analysis = entry
+        if expires_at < time.monotonic():
+            del self._cache[key]
+            return None
+        return analysis
+
+    def set(self, key: bytes, analysis: _QueryAnalysis) -> None:
+        """Store an analysis, evicting the oldest entry when full."""
+        if key not in self._cache and len(self._cache) >= self.max_size:
+            del self._cache[next(iter(self._cache))]
+        self._cache[key] = (time.monotonic() + self.ttl, analysis)
+
+
 class _QueryAnalyzer:
     """Analyzes queries to determine routing (RAG vs general)."""
 
     def __init__(self) -> None:
         settings = get_settings()
-        self._llm = LLMService()
+        self._llm = get_llm_service()
         self._max_sub_queries = settings.max_sub_queries
         self._timeout = settings.query_analysis_timeout
         self._model = settings.query_analysis_model
+        self._cache = _AnalysisCache(_ANALYSIS_CACHE_SIZE, _ANALYSIS_CACHE_TTL_SECONDS)
 
     async def analyze(
         self,
@@ -93,18 +180,26 @@ class _QueryAnalyzer:
         Uses the query text and chat history to decide:
         1. skip_rag - Is this a greeting/meta question?
         2. needs_decomposition - Does this compare multiple docs?
+
+        Simple greetings are filtered out by the handler before this is called.
         """
-        # Fast path: very short = likely greeting
-        words = message.split()
-        if len(words) <= 2:
-            lower = message.lower().strip()
-            if lower in ("hi", "hello", "hey", "help", "?", "thanks", "thank you"):
-                return _QueryAnalysis(
-                    skip_rag=True,
-                    needs_decomposition=False,
-                    sub_queries=[],
-                    reasoning="Greeting detected",
-                )
+        # Fast path: obvious single-lookup document question
+        if (
+            document_names
+            and _RAG_HINTS.search(message)
+            and not _ANALYSIS_HINTS.search(message)
+        ):
+            return _QueryAnalysis(
+                skip_rag=False,
+                needs_decomposition=False,
+                sub_queries=[],
+                reasoning="Document question (keyword fast path)",
+            )
+
+        cache_key = _AnalysisCache.key(message, chat_history, document_names or [])
+        cached = self._cache.get(cache_key)
+        if cached is not None:
+            return cached
 
         # Use LLM for analysis (with chat history context)
         try:
@@ -115,10 +210,9 @@ class _QueryAnalyzer:
             )
 
             # Include document names for better sub-query generation
-            docs_section = ""
-            if document_names:
-                docs_list = "\n".join(f"- {name}" for name in document_names)
-                docs_section = f"\n\nAvailable documents:\n{docs_list}"
+            docs_section = (
+                _documents_section(tuple(document_names)) if document_names else ""
+            )
 
             prompt = QUERY_ANALYSIS_PROMPT.format(
                 question=message,
@@ -126,6 +220,13 @@ class _QueryAnalyzer:
                 max_sub_queries=self._max_sub_queries,
             )
 
+            max_tokens = min(
+                _ANALYSIS_MAX_TOKENS,
+                _ANALYSIS_BASE_TOKENS
+                + _ANALYSIS_TOKENS_PER_SUB_QUERY
+                * min(len(document_names or ()), self._max_sub_queries),
+            )
+
             result = await asyncio.wait_for(
                 self._llm.generate_structured_output(
                     prompt=prompt,
@@ -134,32 +235,35 @@ class _QueryAnalyzer:
                     tool_schema=QUERY_ANALYSIS_SCHEMA,
                     model=self._model,
                     temperature=0,
-                    max_tokens=500,
+                    max_tokens=max_tokens,
                 ),
                 timeout=self._timeout,
             )
 
             skip_rag = result.get("skip_rag", False)
             needs_decomposition = result.get("needs_decomposition", False)
-            sub_queries = result.get("sub_queries", [])[: self._max_sub_queries]
             reasoning = result.get("reasoning", "")
 
-            # Validate sub-queries
-            sub_queries = [
-                sq.strip()[:500]
-                for sq in sub_queries
-                if isinstance(sq, str) and sq.strip()
-            ]
+            # Validate sub-queries (single pass: cap count, drop blanks, cap length)
+            sub_queries: list[str] = []
+            for sq in result.get("sub_queries", [])[: self._max_sub_queries]:
+                if isinstance(sq, str):
+                    stripped = sq.strip()
+                    if stripped:
+                        sub_queries.append(stripped[:500])
 
             if needs_decomposition and not sub_queries:
                 needs_decomposition = False
 
-            return _QueryAnalysis(
+            analysis = _QueryAnalysis(
                 skip_rag=skip_rag,
                 needs_decomposition=needs_decomposition,
                 sub_queries=sub_queries,
                 reasoning=reasoning,
             )
+            # Only successful analyses are cached; fallbacks below are not
+            self._cache.set(cache_key, analysis)
+            return analysis
 
         except (TimeoutError, APITimeoutError) as e:
             logger.warning("Query analysis timed out: %s", e)
@@ -180,6 +284,12 @@ class _QueryAnalyzer:
             )
 
 
+@lru_cache
+def _get_query_analyzer() -> _QueryAnalyzer:
+    """Get the shared query analyzer (reused across requests)."""
+    return _QueryAnalyzer()
+
+
 # --- General Response Generator ---
 
 
@@ -188,14 +298,14 @@ async def _stream_general_response(
     chat_history: str,
 ) -> AsyncGenerator[dict[str, Any], None]:
     """Stream a general (non-RAG) response."""
-    llm = LLMService()
+    llm = get_llm_service()
 
     yield {"type": "sources", "sources": []}
 
     history_section = (
         f"CONVERSATION HISTORY:\n{chat_history}\n\n" if chat_history else ""
     )
-    prompt = f"{history_section}User message: {message}"
+    prompt = ASSISTANT_PROMPT.format(history_section=history_section, message=message)
 
     answer_parts: list[str] = []
     async for chunk in llm.stream(prompt, ASSISTANT_SYSTEM_PROMPT, temperature=0.7):
@@ -206,6 +316,371 @@ async def _stream_general_response(
     yield {"type": "done", "full_answer": full_answer, "sources": []}
 
 
+# Canned replies for the greeting fast path (no LLM round trip)
+_GREETING_TEMPLATE = (
+    "Hi! You've uploaded {n} document(s): {names}. Ask me anything about them."
+)
+_GREETING_NO_DOCS_REPLY = (
+    "Hi! I'm ContextQ. Upload PDF, DOCX or TXT files and ask me anything "
+    "about them - I'll answer with citations to the relevant passages."
+)
+_GREETING_AGAIN_REPLY = "Hi again! What else would you like to know?"
+_THANKS_REPLY = (
+    "You're welcome! Let me know if you have more questions about your documents."
+)
+_HELP_REPLY = (
+    "I answer questions about the documents you upload (PDF, DOCX or TXT). "
+    "Upload a file, then ask about its contents - I can find specific "
+    "details, summarize, and compare documents, citing my sources. "
+    "Mention document names when comparing several."
+)
+
+
+# Max document names listed in a greeting (the rest are counted)
+_GREETING_MAX_NAMES = 10
+
+
+def _greeting_reply(message: str, document_names: list[str], chat_history: str) -> str:
+    """Pick the canned reply for a simple greeting."""
+    normalized = message.strip().lower()
+    if normalized.startswith("thank"):
+        return _THANKS_REPLY
+    if normalized.startswith(("help", "?")):
+        return _HELP_REPLY
+    if chat_history:
+        # Mid-conversation - no need to introduce ourselves again
+        return _GREETING_AGAIN_REPLY
+    if not document_names:
+        return _GREETING_NO_DOCS_REPLY
+    names = ", ".join(document_names[:_GREETING_MAX_NAMES])
+    if len(document_names) > _GREETING_MAX_NAMES:
+        names += f" and {len(document_names) - _GREETING_MAX_NAMES} more"
+    return _GREETING_TEMPLATE.format(n=len(document_names), names=names)
+
+
+async def _stream_canned_response(text: str) -> AsyncGenerator[dict[str, Any], None]:
+    """Stream a fixed reply using the same events as a general response."""
+    yield {"type": "sources", "sources": []}
+    yield {"type": "content", "content": text}
+    yield {"type": "done", "full_answer": text, "sources": []}
+
+
+# --- SSE Encoding ---
+
+
+# Yielded by _coalesce_content when the upstream has been idle for a while;
+# sent as an SSE comment so proxies don't drop the connection
+_KEEPALIVE_EVENT: dict[str, Any] = {"type": "keepalive"}
+_KEEPALIVE_FRAME = b": keepalive\n\n"
+
+
+def _sse(event: dict[str, Any]) -> bytes:
+    """Encode an event as an SSE data frame (bytes go straight to the socket)."""
+    if event is _KEEPALIVE_EVENT:
+        return _KEEPALIVE_FRAME
+    return b"data: " + orjson.dumps(event) + b"\n\n"
+
+
+# --- Stream Coalescing ---
+
+# Token deltas are merged into one SSE frame until either limit is reached,
+# cutting per-frame overhead without visibly slowing the stream.
+_CONTENT_FLUSH_CHARS = 48
+_CONTENT_FLUSH_SECONDS = 0.02
+
+# Idle time after which a keep-alive comment is sent (proxies commonly time
+# out silent connections after 30-60s)
+_KEEPALIVE_SECONDS = 15.0
+
+# Max events buffered between the upstream producer and the SSE consumer -
+# a slow client blocks the producer instead of growing memory unboundedly
+_STREAM_QUEUE_SIZE = 32
+
+# Sentinel marking the end of the upstream event stream
+_STREAM_END = object()
+
+
+async def _coalesce_content(
+    events: AsyncGenerator[dict[str, Any], None],
+) -> AsyncGenerator[dict[str, Any], None]:
+    """Merge consecutive 'content' events into size/time-bounded batches.
+
+    Upstream events are pumped through a bounded queue by a single task, so
+    buffered text is flushed when the timer expires even if the LLM stalls,
+    and a slow client applies backpressure to the LLM stream. Other events
+    pass through unchanged, after any buffered content. If the upstream is
+    idle for _KEEPALIVE_SECONDS, _KEEPALIVE_EVENT is yielded.
+    """
+    queue: asyncio.Queue[Any] = asyncio.Queue(maxsize=_STREAM_QUEUE_SIZE)
+
+    async def pump() -> None:
+        try:
+            async for event in events:
+                await queue.put(event)
+        except Exception as e:
+            await queue.put(e)
+        await queue.put(_STREAM_END)
+
+    producer = asyncio.create_task(pump())
+    loop = asyncio.get_running_loop()
+    buffer: list[str] = []
+    buffered = 0
+    flush_at: float | None = None
+    ping_at = loop.time() + _KEEPALIVE_SECONDS
+
+    try:
+        while True:
+            wake_at = ping_at if flush_at is None else min(flush_at, ping_at)
+            try:
+                item = await asyncio.wait_for(
+                    queue.get(), max(0.0, wake_at - loop.time())
+                )
+            except TimeoutError:
+                if buffer:
+                    yield {"type": "content", "content": "".join(buffer)}
+                    buffer.clear()
+                    buffered = 0
+                    flush_at = None
+                else:
+                    yield _KEEPALIVE_EVENT
+                ping_at = loop.time() + _KEEPALIVE_SECONDS
+                continue
+
+            ping_at = loop.time() + _KEEPALIVE_SECONDS
+            if item is _STREAM_END:
+                break
+            if isinstance(item, Exception):
+                # Deliver text that arrived before the failure, then fail
+                if buffer:
+                    yield {"type": "content", "content": "".join(buffer)}
+                raise item
+
+            if item.get("type") == "content":
+                text = item["content"]
+                buffer.append(text)
+                buffered += len(text)
+                if flush_at is None:
+                    flush_at = loop.time() + _CONTENT_FLUSH_SECONDS
+                if buffered >= _CONTENT_FLUSH_CHARS:
+                    yield {"type": "content", "content": "".join(buffer)}
+                    buffer.clear()
+                    buffered = 0
+                    flush_at = None
+                continue
+
+            if buffer:
+                yield {"type": "content", "content": "".join(buffer)}
+                buffer.clear()
+                buffered = 0
+                flush_at = None
+            yield item
+
+        if buffer:
+            yield {"type": "content", "content": "".join(buffer)}
+
+    finally:
+        # Client disconnected or upstream failed - stop the producer, let it
+        # unwind, then close the upstream generator it was iterating
+        producer.cancel()
+        await asyncio.wait([producer])
+        await events.aclose()
+
+
+# --- Stream Admission ---
+
+
+class _StreamLimiter:
+    """Caps concurrent chat streams; excess requests wait for a free slot."""
+
+    def __init__(self, limit: int) -> None:
+        self._semaphore = asyncio.Semaphore(limit)
+
+    @asynccontextmanager
+    async def slot(self, request_id: str) -> AsyncIterator[None]:
+        """Hold one stream slot for the duration of the block."""
+        if self._semaphore.locked():
+            logger.warning("[%s] Waiting for a stream slot", request_id)
+        async with self._semaphore:
+            yield
+
+
+@lru_cache
+def _get_stream_limiter() -> _StreamLimiter:
+    """Get the process-wide chat stream limiter."""
+    return _StreamLimiter(get_settings().max_concurrent_streams)
+
+
+async def _with_stream_slot(
+    events: AsyncGenerator[bytes, None],
+    request_id: str,
+) -> AsyncGenerator[bytes, None]:
+    """Stream events while holding a slot (released even on disconnect)."""
+    async with _get_stream_limiter().slot(request_id), aclosing(events):
+        async for frame in events:
+            yield frame
+
+
+# --- Background Persistence ---
+
+# Strong references to in-flight background tasks (the event loop only keeps
+# weak ones, so unreferenced tasks may be garbage-collected mid-flight)
+_background_tasks: set[asyncio.Task] = set()
+
+
+def _run_in_background(coro: Coroutine[Any, Any, None]) -> asyncio.Task[None]:
+    """Schedule a fire-and-forget coroutine, keeping it alive until done."""
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
+
+
+def _discard_task(task: asyncio.Task) -> None:
+    """Cancel a speculative task whose result is no longer needed."""
+    task.cancel()
+    # Retrieve any error it already raised so asyncio doesn't log it as unhandled
+    task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+
+async def _persist_assistant_response(
+    chat_history_mgr: ChatHistoryManager,
+    chat_id: str,
+    full_answer: str,
+    sources: list[dict[str, Any]],
+    user_message_saved: asyncio.Task[None],
+) -> None:
+    """Save the assistant message, then maybe refresh the chat summary.
+
+    Waits for the user message save first so messages land in order.
+    All steps are resilient (failures are logged, never raised).
+    """
+    await user_message_saved
+    await chat_history_mgr.save_assistant_message(chat_id, full_answer, sources)
+    await chat_history_mgr.maybe_generate_summary(chat_id)
+
+
+# --- Request Preparation ---
+
+
+@dataclass(slots=True)
+class _PreparedChat:
+    """Everything the response stream needs once the query is analyzed."""
+
+    analysis: _QueryAnalysis
+    chat_history: str
+    doc_ids: list[str]
+    doc_names: list[str]
+    user_message_saved: asyncio.Task[None]
+    # Answered with a canned reply (no analysis or LLM call)
+    is_greeting: bool = False
+    # Speculative plain retrieval, kept only for non-decomposed RAG answers
+    retrieval_task: asyncio.Task[list[RetrievedChunk]] | None = None
+
+
+async def _prepare_chat(
+    request: ChatRequest,
+    session_id: str,
+    request_id: str,
+    rag_service: RAGService,
+    chat_history_mgr: ChatHistoryManager,
+) -> _PreparedChat:
+    """Load context, save the user message and analyze the query."""
+    chat_id = request.chat_id
+
+    # --- Fast path: Skip LLM analysis for simple greetings ---
+    is_simple_greeting = _is_greeting(request.message)
+
+    # --- Prepare context and fetch documents (needed for analysis) ---
+    # Independent reads run concurrently (greetings use them for the canned
+    # reply). The user message is saved only after the history is read, so
+    # it isn't echoed back into the context; the save itself runs in the
+    # background, off the first-token path.
+    chat_history, docs = await asyncio.gather(
+        chat_history_mgr.get_context(chat_id),
+        rag_service.get_session_documents(session_id),
+    )
+    user_message_saved = _run_in_background(
+        chat_history_mgr.save_user_message(chat_id, request.message)
+    )
+    doc_ids = [d.doc_id for d in docs]
+    doc_names = [d.filename for d in docs]
+
+    if is_simple_greeting:
+        # No LLM call needed - go straight to response
+        analysis = _QueryAnalysis(
+            skip_rag=True,
+            needs_decomposition=False,
+            sub_queries=[],
+            reasoning="Simple greeting (fast path)",
+        )
+        logger.debug("[%s] Fast path: greeting detected, skipping analysis", request_id)
+        return _PreparedChat(
+            analysis,
+            chat_history,
+            doc_ids,
+            doc_names,
+            user_message_saved,
+            is_greeting=True,
+        )
+
+    # Most questions go to RAG, so start plain retrieval alongside analysis.
+    # It's dropped if analysis skips RAG or decomposes the question.
+    retrieval_task: asyncio.Task[list[RetrievedChunk]] | None = None
+    if doc_ids:
+        retrieval_task = asyncio.create_task(
+            rag_service.retrieve(
+                request.message, session_id, request.doc_ids or doc_ids
+            )
+        )
+
+    try:
+        # Full LLM analysis for complex queries
+        analysis = await _get_query_analyzer().analyze(
+            request.message, chat_history, doc_names
+        )
+    except BaseException:
+        if retrieval_task:
+            _discard_task(retrieval_task)
+        raise
+
+    logger.info(
+        "[%s] Query Analysis: skip_rag=%s, decompose=%s, reasoning=%s",
+        request_id,
+        analysis.skip_rag,
+        analysis.needs_decomposition,
+        analysis.reasoning,
+    )
+    if (
+        analysis.needs_decomposition
+        and analysis.sub_queries
+        and logger.isEnabledFor(logging.INFO)
+    ):
+        logger.info(
+            "[%s] Original query: %s",
+            request_id,
+            request.message[:200],
+        )
+        logger.info(
+            "[%s] Decomposed into %d sub-queries: %s",
+            request_id,
+            len(analysis.sub_queries),
+            analysis.sub_queries,
+        )
+
+    if retrieval_task and (analysis.skip_rag or analysis.needs_decomposition):
+        _discard_task(retrieval_task)
+        retrieval_task = None
+
+    return _PreparedChat(
+        analysis,
+        chat_history,
+        doc_ids,
+        doc_names,
+        user_message_saved,
+        retrieval_task=retrieval_task,
+    )
+
+
 # --- Handler ---
 
 
@@ -231,115 +706,102 @@ async def stream_response(
         session_id = str(uuid.uuid4())
 
     chat_id = request.chat_id
-    request_id = str(uuid.uuid4())[:8]
+    request_id = secrets.token_hex(4)
     logger.info("[%s] Chat: %s", request_id, request.message[:100])
 
-    # --- Prepare context ---
-    chat_history = await chat_history_mgr.get_context(chat_id)
-    await chat_history_mgr.save_user_message(chat_id, request.message)
-
-    # --- Fetch documents early (needed for analysis) ---
-    docs = await rag_service.get_session_documents(session_id)
-    doc_ids = [d.doc_id for d in docs]
-    doc_names = [d.filename for d in docs]
-
-    # --- Fast path: Skip LLM analysis for simple greetings ---
-    simple_greetings = {"hi", "hello", "hey", "help", "?", "thanks", "thank you"}
-    message_lower = request.message.lower().strip()
-    is_simple_greeting = (
-        len(request.message.split()) <= 2 and message_lower in simple_greetings
-    )
-
-    if is_simple_greeting:
-        # No LLM call needed - go straight to response
-        analysis = _QueryAnalysis(
-            skip_rag=True,
-            needs_decomposition=False,
-            sub_queries=[],
-            reasoning="Simple greeting (fast path)",
-        )
-        logger.debug("[%s] Fast path: greeting detected, skipping analysis", request_id)
-    else:
-        # Full LLM analysis for complex queries
-        analyzer = _QueryAnalyzer()
-        analysis = await analyzer.analyze(request.message, chat_history, doc_names)
-        logger.info(
-            "[%s] Query Analysis: skip_rag=%s, decompose=%s, reasoning=%s",
-            request_id,
-            analysis.skip_rag,
-            analysis.needs_decomposition,
-            analysis.reasoning,
-        )
-        if analysis.needs_decomposition and analysis.sub_queries:
-            logger.info(
-                "[%s] Original query: %s",
-                request_id,
-                request.message[:200],
-            )
-            logger.info(
-                "[%s] Decomposed into %d sub-queries: %s",
-                request_id,
-                len(analysis.sub_queries),
-                analysis.sub_queries,
-            )
-
-    # --- SSE Generator (streaming only) ---
-    async def generate_sse_events():
+    # --- SSE Generator ---
+    # Everything below runs inside the stream slot (see _with_stream_slot),
+    # so analysis and retrieval calls are capped along with the answer stream
+    async def generate_sse_events() -> AsyncGenerator[bytes, None]:
+        prepared: _PreparedChat | None = None
         try:
+            prepared = await _prepare_chat(
+                request, session_id, request_id, rag_service, chat_history_mgr
+            )
+            analysis = prepared.analysis
+            chat_history = prepared.chat_history
             full_answer = ""
             sources = []
 
             if analysis.skip_rag:
-                # General response (no RAG)
-                async for chunk in _stream_general_response(
-                    request.message, chat_history
-                ):
+                # General response (no RAG); greetings get a canned reply
+                general_stream = (
+                    _stream_canned_response(
+                        _greeting_reply(
+                            request.message, prepared.doc_names, chat_history
+                        )
+                    )
+                    if prepared.is_greeting
+                    else _stream_general_response(request.message, chat_history)
+                )
+                async for chunk in _coalesce_content(general_stream):
                     if chunk.get("type") == "done":
                         full_answer = chunk.get("full_answer", "")
                         sources = chunk.get("sources", [])
                     else:
-                        yield f"data: {json.dumps(chunk)}\n\n"
+                        yield _sse(chunk)
 
-            elif not doc_ids:
+            elif not prepared.doc_ids:
                 # No documents uploaded
                 no_docs_msg = "No documents have been uploaded yet. Please upload some documents first."
-                yield f"data: {json.dumps({'type': 'sources', 'sources': []})}\n\n"
-                yield f"data: {json.dumps({'type': 'content', 'content': no_docs_msg})}\n\n"
+                yield _sse({"type": "sources", "sources": []})
+                yield _sse({"type": "content", "content": no_docs_msg})
                 full_answer = no_docs_msg
 
             else:
-                # RAG response
-                async for chunk in rag_service.retrieve_and_generate(
-                    message=request.message,
-                    session_id=session_id,
-                    chat_history=chat_history,
-                    doc_ids=request.doc_ids or doc_ids,
-                    sub_queries=analysis.sub_queries
-                    if analysis.needs_decomposition
-                    else None,
+                # RAG response (reusing the speculative retrieval if kept)
+                retrieval_task = prepared.retrieval_task
+                chunks = await retrieval_task if retrieval_task else None
+                async for chunk in _coalesce_content(
+                    rag_service.retrieve_and_generate(
+                        message=request.message,
+                        session_id=session_id,
+                        chat_history=chat_history,
+                        doc_ids=request.doc_ids or prepared.doc_ids,
+                        sub_queries=analysis.sub_queries
+                        if analysis.needs_decomposition
+                        else None,
+                        chunks=chunks,
+                    )
                 ):
                     if chunk.get("type") == "done":
                         full_answer = chunk.get("full_answer", "")
                         sources = chunk.get("sources", [])
                     else:
-                        yield f"data: {json.dumps(chunk)}\n\n"
-
-            # Save assistant response
-            await chat_history_mgr.save_assistant_message(chat_id, full_answer, sources)
-            await chat_history_mgr.maybe_generate_summary(chat_id)
+                        yield _sse(chunk)
+
+            # Persist in the background - the client already has the answer.
+            # Scheduled before the final yield so a disconnect can't skip it.
+            _run_in_background(
+                _persist_assistant_response(
+                    chat_history_mgr,
+                    chat_id,
+                    full_answer,
+                    sources,
+                    prepared.user_message_saved,
+                )
+            )
 
-            yield f"data: {json.dumps({'type': 'done'})}\n\n"
+            yield _sse({"type": "done"})
 
         except Exception as e:
             logger.exception("[%s] Stream error", request_id)
-            yield f"data: {json.dumps({'type': 'error', 'error': str(e)})}\n\n"
+            yield _sse({"type": "error", "error": str(e)})
+
+        finally:
+            # No-op once the retrieval was awaited; stops it on early exit
+            if prepared and prepared.retrieval_task:
+                _discard_task(prepared.retrieval_task)
 
     return StreamingResponse(
-        generate_sse_events(),
+        _with_stream_slot(generate_sse_events(), request_id),
         media_type="text/event-stream",
         headers={
             "Cache-Control": "no-cache",
             "Connection": "keep-alive",
+            # Keep reverse proxies (nginx) from buffering the stream - frames
+            # must reach the browser as they are sent
+            "X-Accel-Buffering": "no",
             "X-Request-ID": request_id,
         },
     )
@@ -2,7 +2,12 @@
 
 from fastapi import APIRouter
 
-from apps.chat.handlers import clear_chat_history, get_chat_history, stream_response
+from apps.chat.handlers import (
+    clear_chat_history,
+    get_chat_history,
+    stream_chat_history,
+    stream_response,
+)
 from apps.chat.handlers.get_chat_history import ChatHistoryResponse
 
 router = APIRouter(prefix="/chat", tags=["Chat"])
@@ -13,5 +18,8 @@ router.post("")(stream_response)
 # GET /chat/history - Get chat history
 router.get("/history", response_model=ChatHistoryResponse)(get_chat_history)
 
+# GET /chat/history/stream - Stream chat history as NDJSON
+router.get("/history/stream")(stream_chat_history)
+
 # DELETE /chat/history - Clear chat history
 router.delete("/history")(clear_chat_history)
@@ -1,6 +1,7 @@
 """DELETE /documents/{doc_id} - Delete a document."""
 
 import logging
+import secrets
 import uuid
 
 from fastapi import Cookie
@@ -21,7 +22,7 @@ async def delete_document(
     if not session_id:
         session_id = str(uuid.uuid4())
 
-    request_id = str(uuid.uuid4())[:8]
+    request_id = secrets.token_hex(4)
     logger.info("[%s] Delete request for doc: %s", request_id, doc_id)
 
     vector_store = get_vector_store()
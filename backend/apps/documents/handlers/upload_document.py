@@ -1,10 +1,15 @@
 """POST /documents/upload - Upload and process a document."""
 
+import asyncio
+import contextlib
+import hashlib
 import logging
 import os
+import secrets
 import tempfile
 import uuid
 from datetime import UTC, datetime
+from typing import IO
 
 from fastapi import Cookie, Depends, File, UploadFile
 from fastapi.responses import JSONResponse
@@ -34,6 +39,9 @@ from services.vector_store import VectorStoreError
 
 logger = logging.getLogger(__name__)
 
+# Uploads are copied to disk in pieces of this size, not read whole
+_UPLOAD_READ_CHUNK_BYTES = 1024 * 1024
+
 
 # --- Response Schema ---
 
@@ -65,6 +73,28 @@ UPLOAD_ERROR_MAP = {
 # --- Handler ---
 
 
+def _copy_and_hash(source: IO[bytes], temp_file: IO[bytes]) -> str:
+    """Copy an upload to the temp file in pieces, returning its SHA-256."""
+    hasher = hashlib.sha256()
+    while chunk := source.read(_UPLOAD_READ_CHUNK_BYTES):
+        hasher.update(chunk)
+        temp_file.write(chunk)
+    return hasher.hexdigest()
+
+
+def _duplicate_response(
+    existing_doc_id: str, session_id: str, request_id: str
+) -> JSONResponse:
+    """Build the response for a document that was already processed."""
+    logger.info("[%s] Duplicate: %s", request_id, existing_doc_id)
+    resp = success_response(
+        ResponseCode.DUPLICATE_DOCUMENT,
+        {"doc_id": existing_doc_id, "message": "Document already processed"},
+        request_id,
+    )
+    return set_session_cookie(resp, session_id)
+
+
 async def upload_document(
     file: UploadFile = File(...),
     session_id: str | None = Cookie(default=None),
@@ -76,16 +106,17 @@ async def upload_document(
 
     Flow:
     1. Validate file (type, size)
-    2. Parse document (extract text)
-    3. Check for duplicates
-    4. Chunk text
-    5. Generate embeddings
-    6. Store in vector database
+    2. Save to temp file, hashing the raw bytes
+    3. Check for an identical file (before any parsing)
+    4. Parse document (extract text) and check for duplicate text
+    5. Chunk text
+    6. Generate embeddings
+    7. Store in vector database
     """
     if not session_id:
         session_id = str(uuid.uuid4())
 
-    request_id = str(uuid.uuid4())[:8]
+    request_id = secrets.token_hex(4)
     temp_path = None
 
     logger.info("[%s] Upload: %s (%s bytes)", request_id, file.filename, file.size)
@@ -99,47 +130,53 @@ async def upload_document(
             content_type=file.content_type,
         )
 
-        # 2. Save to temp and parse
-        with tempfile.NamedTemporaryFile(delete=False, suffix=file_ext) as temp_file:
-            temp_path = temp_file.name
-            content = await file.read()
-            temp_file.write(content)
+        # 2. Save to temp (hashing the raw bytes on the way)
+        # The whole copy runs in one worker thread (rather than a thread hop
+        # per piece) so it doesn't stall other requests' streams
+        temp_file = await asyncio.to_thread(
+            tempfile.NamedTemporaryFile, delete=False, suffix=file_ext
+        )
+        temp_path = temp_file.name
+        with temp_file:
+            file_hash = await asyncio.to_thread(_copy_and_hash, file.file, temp_file)
+
+        # 3. Same file already uploaded? Skip parsing entirely
+        existing_doc_id = await vector_store.check_hash_exists(
+            file_hash, session_id, field="file_hash"
+        )
+        if existing_doc_id:
+            return _duplicate_response(existing_doc_id, session_id, request_id)
 
+        # 4. Parse, then check for the same text in a different file
         parse_result = await document_parser.parse_file(
             temp_path, file.filename or "document"
         )
 
-        # 3. Check for duplicates
         existing_doc_id = await vector_store.check_hash_exists(
             parse_result["content_hash"], session_id
         )
         if existing_doc_id:
-            logger.info("[%s] Duplicate: %s", request_id, existing_doc_id)
-            resp = success_response(
-                ResponseCode.DUPLICATE_DOCUMENT,
-                {"doc_id": existing_doc_id, "message": "Document already processed"},
-                request_id,
-            )
-            return set_session_cookie(resp, session_id)
-
-        # 4. Chunk text
+            return _duplicate_response(existing_doc_id, session_id, request_id)
+
+        # 5. Chunk text
         chunks = chunker.chunk_text(
             parse_result["text"], parse_result.get("page_count")
         )
 
-        # 5. Generate embeddings (include filename for searchability)
+        # 6. Generate embeddings (include filename for searchability)
         filename = parse_result["metadata"]["filename"]
         embeddings = await embedding_service.embed_texts(
             [f"Document: {filename}\n\n{c.text}" for c in chunks]
         )
 
-        # 6. Store in vector database
+        # 7. Store in vector database
         doc_id = str(uuid.uuid4())
         upload_timestamp = datetime.now(UTC).isoformat()
         metadata = {
             "filename": parse_result["metadata"]["filename"],
             "document_type": parse_result["metadata"]["document_type"],
             "content_hash": parse_result["content_hash"],
+            "file_hash": file_hash,
             "upload_timestamp": upload_timestamp,
         }
 
@@ -189,5 +226,6 @@ async def upload_document(
 
     finally:
         # Cleanup temp file
-        if temp_path and os.path.exists(temp_path):
-            os.unlink(temp_path)
+        if temp_path:
+            with contextlib.suppress(FileNotFoundError):
+                await asyncio.to_thread(os.unlink, temp_path)
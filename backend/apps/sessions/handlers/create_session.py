@@ -1,6 +1,7 @@
 """POST /chats - Create a new chat."""
 
 import logging
+import secrets
 import uuid
 
 from fastapi import Cookie
@@ -20,7 +21,7 @@ async def create_chat(
     if not session_id:
         session_id = str(uuid.uuid4())
 
-    request_id = str(uuid.uuid4())[:8]
+    request_id = secrets.token_hex(4)
     chat_id = str(uuid.uuid4())
 
     firestore_service = get_firestore_service()
@@ -1,11 +1,12 @@
 """DELETE /chats/{chat_id} - Delete a chat."""
 
 import logging
-import uuid
+import secrets
 
 from fastapi.responses import JSONResponse
 
 from db import get_firestore_service
+from dependencies import get_chat_history_manager
 from responses import ResponseCode, error_response, success_response
 
 logger = logging.getLogger(__name__)
@@ -13,10 +14,12 @@ logger = logging.getLogger(__name__)
 
 async def delete_chat(chat_id: str) -> JSONResponse:
     """Delete a chat and all its messages."""
-    request_id = str(uuid.uuid4())[:8]
+    request_id = secrets.token_hex(4)
     logger.info("[%s] Delete chat request: %s", request_id, chat_id)
 
     firestore_service = get_firestore_service()
+    # Drop the cached message count so the summary schedule re-reads it
+    get_chat_history_manager().forget_chat(chat_id)
 
     try:
         success = await firestore_service.delete_chat(chat_id)
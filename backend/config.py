@@ -88,6 +88,9 @@ class Settings(BaseSettings):
         default=0.2, description="LLM temperature for factual responses"
     )
     llm_max_tokens: int = Field(default=2048, description="Max tokens for generation")
+    max_concurrent_streams: int = Field(
+        default=50, description="Max chat responses streamed concurrently"
+    )
 
     # Query Decomposition Settings
     max_sub_queries: int = Field(
@@ -100,14 +103,18 @@ class Settings(BaseSettings):
         default=10.0, description="Timeout for query analysis LLM call in seconds"
     )
     query_analysis_model: str = Field(
-        default="claude-sonnet-4-20250514",
-        description="Model for query analysis (can differ from main LLM)",
+        default="claude-haiku-4-5",
+        description="Model for query analysis (small/fast model; classification only)",
     )
 
     # RAG Retrieval Settings
     min_relevance_score: float = Field(
         default=0.34, description="Minimum cosine similarity score for chunk relevance"
     )
+    context_token_budget: int = Field(
+        default=8000,
+        description="Approximate token budget for retrieved context sent to the LLM",
+    )
     vector_store_batch_size: int = Field(
         default=100, description="Batch size for vector store upsert operations"
     )
@@ -135,6 +142,9 @@ class Settings(BaseSettings):
     embedding_batch_size: int = Field(
         default=64, description="Batch size for embedding API calls"
     )
+    embedding_max_concurrency: int = Field(
+        default=4, description="Max embedding batches in flight at once"
+    )
 
     @field_validator("anthropic_api_key", "voyage_api_key", "qdrant_api_key")
     @classmethod
@@ -5,9 +5,11 @@ Stores chat messages in Firestore with chat-based subcollections.
 - session_id is used only for document filtering in Qdrant, not here
 """
 
+import asyncio
 import json
 import logging
 import os
+from collections.abc import AsyncIterator
 from datetime import UTC, datetime
 from typing import Any
 
@@ -113,26 +115,37 @@ class FirestoreService:
             logger.error("Failed to add message: %s", e)
             raise
 
-    async def get_messages(self, chat_id: str, limit: int = 10) -> list[dict[str, Any]]:
-        """Get recent messages from chat history."""
+    async def get_messages(
+        self, chat_id: str, limit: int = 10, before: str | None = None
+    ) -> list[dict[str, Any]]:
+        """Get recent messages from chat history (oldest first).
+
+        Args:
+            chat_id: Chat ID.
+            limit: Max messages to return.
+            before: Optional message ID cursor - only messages older than
+                this one are returned (for paging back through history).
+                An unknown cursor returns no messages.
+        """
         try:
-            messages_ref = (
-                self.db.collection("chats")
-                .document(chat_id)
-                .collection("messages")
-                .order_by("timestamp", direction=firestore.Query.DESCENDING)
-                .limit(limit)
+            collection = (
+                self.db.collection("chats").document(chat_id).collection("messages")
             )
-
-            docs = await messages_ref.get()
-            messages = []
-
-            for doc in docs:
-                data = doc.to_dict()
-                data["id"] = doc.id
-                if data.get("timestamp"):
-                    data["timestamp"] = data["timestamp"].isoformat()
-                messages.append(data)
+            messages_ref = collection.order_by(
+                "timestamp", direction=firestore.Query.DESCENDING
+            )
+            if before:
+                cursor = await collection.document(before).get()
+                if not cursor.exists:
+                    # Falling back to the newest page would loop a pager forever
+                    logger.warning(
+                        "Unknown message cursor %s in chat %s", before, chat_id
+                    )
+                    return []
+                messages_ref = messages_ref.start_after(cursor)
+
+            docs = await messages_ref.limit(limit).get()
+            messages = [self._message_to_dict(doc) for doc in docs]
 
             messages.reverse()
             return messages
@@ -141,6 +154,55 @@ class FirestoreService:
             logger.error("Failed to get messages: %s", e)
             raise
 
+    async def stream_messages(
+        self, chat_id: str, limit: int | None = None, after: str | None = None
+    ) -> AsyncIterator[dict[str, Any]]:
+        """Stream messages from chat history (oldest first) as they arrive.
+
+        Unlike get_messages, results are not materialized into a list, so
+        memory stays bounded however many messages are requested.
+
+        Args:
+            chat_id: Chat ID.
+            limit: Optional max messages to stream.
+            after: Optional message ID cursor - only messages newer than
+                this one are streamed. An unknown cursor streams nothing.
+        """
+        try:
+            collection = (
+                self.db.collection("chats").document(chat_id).collection("messages")
+            )
+            messages_ref = collection.order_by(
+                "timestamp", direction=firestore.Query.ASCENDING
+            )
+            if after:
+                cursor = await collection.document(after).get()
+                if not cursor.exists:
+                    # Streaming from the start would replay the whole chat
+                    logger.warning(
+                        "Unknown message cursor %s in chat %s", after, chat_id
+                    )
+                    return
+                messages_ref = messages_ref.start_after(cursor)
+            if limit:
+                messages_ref = messages_ref.limit(limit)
+
+            async for doc in messages_ref.stream():
+                yield self._message_to_dict(doc)
+
+        except Exception as e:
+            logger.error("Failed to stream messages: %s", e)
+            raise
+
+    @staticmethod
+    def _message_to_dict(doc: Any) -> dict[str, Any]:
+        """Convert a message snapshot to a dict with its ID and ISO timestamp."""
+        data = doc.to_dict()
+        data["id"] = doc.id
+        if data.get("timestamp"):
+            data["timestamp"] = data["timestamp"].isoformat()
+        return data
+
     async def get_message_count(self, chat_id: str) -> int:
         """Get total message count for a chat."""
         try:
@@ -219,27 +281,28 @@ class FirestoreService:
             raise
 
     async def build_chat_context(self, chat_id: str, max_messages: int = 10) -> str:
-        """Build chat context for LLM from history."""
-        try:
-            message_count = await self.get_message_count(chat_id)
+        """Build chat context for LLM from history.
 
-            if message_count == 0:
-                return ""
-
-            messages = await self.get_messages(chat_id, limit=max_messages)
+        Recent messages plus the rolling summary of older ones. Both reads
+        run concurrently; one extra message is fetched to tell whether
+        older messages exist, instead of a separate count query.
+        """
+        try:
+            messages, summary = await asyncio.gather(
+                self.get_messages(chat_id, limit=max_messages + 1),
+                self.get_or_create_summary(chat_id),
+            )
 
-            if message_count <= max_messages:
+            if len(messages) <= max_messages:
                 return self._format_messages_for_context(messages)
 
-            summary = await self.get_or_create_summary(chat_id)
+            messages = messages[1:]  # Drop the oldest (over-fetched) message
 
             context_parts = []
             if summary:
                 context_parts.append(f"[Previous conversation summary]\n{summary}")
 
-            context_parts.append(
-                f"[Recent messages ({len(messages)} of {message_count} total)]"
-            )
+            context_parts.append(f"[Recent messages (last {len(messages)})]")
             context_parts.append(self._format_messages_for_context(messages))
 
             return "\n\n".join(context_parts)
@@ -325,32 +388,77 @@ class FirestoreService:
         """Update chat's last activity and optionally set title."""
         try:
             chat_ref = self.db.collection("chats").document(chat_id)
-            update_data: dict[str, Any] = {"last_activity": datetime.now(UTC)}
-
-            doc = await chat_ref.get()
-            if doc.exists:
-                data = doc.to_dict()
-                update_data["message_count"] = (data.get("message_count", 0) or 0) + 1
-
-                if first_message and data.get("title") == "New Chat":
-                    title = first_message[:50]
-                    if len(first_message) > 50:
-                        title += "..."
-                    update_data["title"] = title
-            else:
-                update_data["message_count"] = 1
-                if first_message:
-                    title = first_message[:50]
-                    if len(first_message) > 50:
-                        title += "..."
-                    update_data["title"] = title
-
+            update_data = await self._chat_activity_update(chat_ref, first_message)
             await chat_ref.set(update_data, merge=True)
 
         except Exception as e:
             logger.error("Failed to update chat activity: %s", e)
             raise
 
+    async def add_message_and_touch(
+        self,
+        chat_id: str,
+        role: str,
+        content: str,
+        first_message: str | None = None,
+    ) -> str:
+        """Add a message and update chat activity in one atomic batch write.
+
+        Equivalent to add_message + update_chat_activity, but both writes
+        commit in a single RPC, so a message is never saved without its
+        activity update (or vice versa).
+        """
+        try:
+            chat_ref = self.db.collection("chats").document(chat_id)
+            message_ref = chat_ref.collection("messages").document()
+            update_data = await self._chat_activity_update(chat_ref, first_message)
+
+            batch = self.db.batch()
+            batch.set(
+                message_ref,
+                {
+                    "role": role,
+                    "content": content,
+                    "timestamp": datetime.now(UTC),
+                    "sources": [],
+                },
+            )
+            batch.set(chat_ref, update_data, merge=True)
+            await batch.commit()
+
+            logger.debug("Added message to chat %s", chat_id)
+            return message_ref.id
+
+        except Exception as e:
+            logger.error("Failed to add message: %s", e)
+            raise
+
+    async def _chat_activity_update(
+        self, chat_ref: Any, first_message: str | None
+    ) -> dict[str, Any]:
+        """Build the activity update for a chat (bumped count, maybe a title)."""
+        update_data: dict[str, Any] = {"last_activity": datetime.now(UTC)}
+
+        doc = await chat_ref.get()
+        if doc.exists:
+            data = doc.to_dict()
+            update_data["message_count"] = (data.get("message_count", 0) or 0) + 1
+
+            if first_message and data.get("title") == "New Chat":
+                title = first_message[:50]
+                if len(first_message) > 50:
+                    title += "..."
+                update_data["title"] = title
+        else:
+            update_data["message_count"] = 1
+            if first_message:
+                title = first_message[:50]
+                if len(first_message) > 50:
+                    title += "..."
+                update_data["title"] = title
+
+        return update_data
+
     async def delete_chat(self, chat_id: str) -> bool:
         """Delete a chat and all its messages."""
         try:
@@ -369,13 +477,13 @@ class FirestoreService:
         """Check Firestore connection health."""
         import time
 
-        start = time.time()
+        start = time.perf_counter()
         try:
             test_ref = self.db.collection("_health_check").document("test")
             await test_ref.set({"timestamp": datetime.now(UTC)})
             await test_ref.get()
 
-            latency = (time.time() - start) * 1000
+            latency = (time.perf_counter() - start) * 1000
             return {"status": "healthy", "latency_ms": round(latency, 2)}
         except Exception as e:
             return {"status": "unhealthy", "error": str(e)}
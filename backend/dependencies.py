@@ -9,6 +9,7 @@ from functools import lru_cache
 from fastapi import Depends
 
 from db import FirestoreService
+from llm import LLMService
 from services.chunker import Chunker
 from services.embeddings import EmbeddingService
 from services.rag import RAGService
@@ -36,6 +37,12 @@ def get_firestore_service() -> FirestoreService:
     return FirestoreService()
 
 
+@lru_cache
+def get_llm_service() -> LLMService:
+    """Get cached LLM service (shared by RAG and chat history)."""
+    return LLMService()
+
+
 # --- Lightweight Services (per-request is fine) ---
 
 
@@ -51,6 +58,7 @@ def get_chunker() -> Chunker:
 def get_rag_service(
     embedding_service: EmbeddingService = Depends(get_embedding_service),
     vector_store: VectorStoreService = Depends(get_vector_store),
+    llm: LLMService = Depends(get_llm_service),
 ) -> RAGService:
     """Get RAG service with injected dependencies.
 
@@ -59,23 +67,24 @@ def get_rag_service(
     return RAGService(
         embedding_service=embedding_service,
         vector_store=vector_store,
+        llm=llm,
     )
 
 
-def get_chat_history_manager(
-    firestore_service: FirestoreService = Depends(get_firestore_service),
-):
-    """Get chat history manager with injected dependencies.
+@lru_cache
+def get_chat_history_manager():
+    """Get cached chat history manager.
+
+    Cached (not per-request) so its in-memory message counts persist.
 
     Returns:
         ChatHistoryManager instance for managing chat persistence.
     """
     from apps.chat.chat_history import ChatHistoryManager
     from config import get_settings
-    from llm import LLMService
 
     return ChatHistoryManager(
-        firestore_service=firestore_service,
-        llm_client=LLMService(get_settings()),
+        firestore_service=get_firestore_service(),
+        llm_client=get_llm_service(),
         settings=get_settings(),
     )
@@ -18,7 +18,11 @@ Structure:
 from llm.anthropic import AnthropicService
 from llm.base import BaseLLMService, LLMError
 from llm.prompts import (
+    ASSISTANT_PROMPT,
     ASSISTANT_SYSTEM_PROMPT,
+    CHAT_SUMMARY_PROMPT,
+    CHAT_SUMMARY_SYSTEM_PROMPT,
+    DOCUMENT_QA_PROMPT,
     DOCUMENT_QA_SYSTEM_PROMPT,
     QUERY_ANALYSIS_PROMPT,
 )
@@ -31,7 +35,11 @@ __all__ = [
     "LLMService",
     "LLMError",
     "AnthropicService",
+    "DOCUMENT_QA_PROMPT",
     "DOCUMENT_QA_SYSTEM_PROMPT",
+    "ASSISTANT_PROMPT",
     "ASSISTANT_SYSTEM_PROMPT",
+    "CHAT_SUMMARY_PROMPT",
+    "CHAT_SUMMARY_SYSTEM_PROMPT",
     "QUERY_ANALYSIS_PROMPT",
 ]
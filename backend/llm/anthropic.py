@@ -2,9 +2,15 @@
 
 import logging
 from collections.abc import AsyncGenerator
+from functools import lru_cache
 
 import httpx
-from anthropic import APIError, AsyncAnthropic, RateLimitError
+from anthropic import (
+    APIError,
+    AsyncAnthropic,
+    DefaultAsyncHttpxClient,
+    RateLimitError,
+)
 
 from config import get_settings
 
@@ -12,6 +18,47 @@ from .base import BaseLLMService, LLMError
 
 logger = logging.getLogger(__name__)
 
+# Connection pool sized for concurrent streaming chats: keep more idle
+# connections warm so bursts reuse TLS sessions instead of reconnecting.
+# With HTTP/2, concurrent streams also multiplex over a single connection.
+_HTTP_LIMITS = httpx.Limits(
+    max_connections=100,
+    max_keepalive_connections=50,
+    keepalive_expiry=60.0,
+)
+
+
+@lru_cache
+def _shared_client() -> AsyncAnthropic:
+    """Get the process-wide Anthropic client.
+
+    Services are constructed per request (RAGService, the query analyzer), so
+    sharing one client keeps its connection pool warm across requests.
+    """
+    settings = get_settings()
+    return AsyncAnthropic(
+        api_key=settings.anthropic_api_key,
+        timeout=httpx.Timeout(timeout=60.0, connect=10.0),
+        http_client=DefaultAsyncHttpxClient(limits=_HTTP_LIMITS, http2=True),
+    )
+
+
+async def close_shared_client() -> None:
+    """Close the shared Anthropic client, if it was ever created."""
+    if _shared_client.cache_info().currsize:
+        await _shared_client().close()
+        _shared_client.cache_clear()
+
+
+def _cacheable_system(system: str) -> list[dict]:
+    """Wrap a system prompt in a content block marked for prompt caching.
+
+    Anthropic reuses the cached prefix (tools + system) across calls within
+    the cache TTL; prompts below the model's minimum cacheable length are
+    simply sent uncached.
+    """
+    return [{"type": "text", "text": system, "cache_control": {"type": "ephemeral"}}]
+
 
 class AnthropicService(BaseLLMService):
     """Claude LLM service via Anthropic API."""
@@ -20,11 +67,14 @@ class AnthropicService(BaseLLMService):
         settings = get_settings()
         self.model = model or settings.llm_model
         self.settings = settings
+        self._client = _shared_client()
 
-        self._client = AsyncAnthropic(
-            api_key=settings.anthropic_api_key,
-            timeout=httpx.Timeout(timeout=60.0, connect=10.0),
-        )
+    async def check_model(self, model: str) -> None:
+        """Verify the API serves a model ID (raises LLMError if not)."""
+        try:
+            await self._client.models.retrieve(model)
+        except APIError as e:
+            raise LLMError(f"Model '{model}' is unavailable: {e}") from e
 
     async def generate(
         self,
@@ -42,9 +92,11 @@ class AnthropicService(BaseLLMService):
                 temperature=temperature
                 if temperature is not None
                 else self.settings.llm_temperature,
-                system=system,
+                system=_cacheable_system(system),
                 messages=[{"role": "user", "content": prompt}],
             )
+            if not response.content:
+                raise LLMError("LLM returned an empty response")
             return response.content[0].text
 
         except RateLimitError as e:
@@ -70,7 +122,7 @@ class AnthropicService(BaseLLMService):
                 temperature=temperature
                 if temperature is not None
                 else self.settings.llm_temperature,
-                system=system,
+                system=_cacheable_system(system),
                 messages=[{"role": "user", "content": prompt}],
             ) as stream:
                 async for text in stream.text_stream:
@@ -100,7 +152,7 @@ class AnthropicService(BaseLLMService):
                 model=model or self.settings.query_analysis_model,
                 max_tokens=max_tokens or 1024,
                 temperature=temperature if temperature is not None else 0,
-                system=system,
+                system=_cacheable_system(system),
                 messages=[{"role": "user", "content": prompt}],
                 tools=[
                     {
@@ -112,6 +164,10 @@ class AnthropicService(BaseLLMService):
                 tool_choice={"type": "tool", "name": tool_name},
             )
 
+            # A truncated tool call parses but may be missing fields
+            if response.stop_reason == "max_tokens":
+                raise LLMError(f"Tool '{tool_name}' output hit max_tokens")
+
             for block in response.content:
                 if block.type == "tool_use" and block.name == tool_name:
                     return block.input
@@ -1,4 +1,4 @@
-"""System prompt for general assistant interactions."""
+"""Prompts for general assistant interactions."""
 
 ASSISTANT_SYSTEM_PROMPT = """You are ContextQ, a smart document Q&A assistant that helps users understand and query their uploaded documents.
 
@@ -43,3 +43,7 @@ ASSISTANT_SYSTEM_PROMPT = """You are ContextQ, a smart document Q&A assistant th
 4. Use follow-up questions for clarification
 
 When users ask about capabilities or have general questions, respond helpfully and guide them on how to use the system effectively."""
+
+# User prompt template for general (non-RAG) replies
+# Placeholders: {history_section}, {message}
+ASSISTANT_PROMPT = "{history_section}User message: {message}"
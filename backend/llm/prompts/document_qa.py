@@ -1,4 +1,4 @@
-"""System prompt for RAG-based document Q&A."""
+"""Prompts for RAG-based document Q&A."""
 
 DOCUMENT_QA_SYSTEM_PROMPT = """You are a helpful assistant that answers questions based ONLY on the provided document context.
 
@@ -18,3 +18,14 @@ When answering:
 - Be concise but complete
 - Reference specific sources when possible
 - If asked about something not in the documents, clearly state that"""
+
+# User prompt template for RAG answers
+# Placeholders: {history_section}, {context}, {question}
+DOCUMENT_QA_PROMPT = """{history_section}Based on the following document excerpts, please answer the question.
+
+DOCUMENT CONTEXT:
+{context}
+
+QUESTION: {question}
+
+Please provide a clear, accurate answer based only on the information in the documents above."""
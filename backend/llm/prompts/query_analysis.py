@@ -46,15 +46,16 @@ QUERY_ANALYSIS_SCHEMA = {
             "type": "boolean",
             "description": "True if question requires multiple document queries (comparison, cross-reference)",
         },
-        "reasoning": {
-            "type": "string",
-            "description": "Brief explanation of the decision",
-        },
         "sub_queries": {
             "type": "array",
             "items": {"type": "string"},
             "description": "Sub-queries if decomposition is needed, empty otherwise",
         },
+        # Last, so a long explanation can't crowd out the routing fields
+        "reasoning": {
+            "type": "string",
+            "description": "Brief explanation of the decision",
+        },
     },
-    "required": ["skip_rag", "needs_decomposition", "reasoning", "sub_queries"],
+    "required": ["skip_rag", "needs_decomposition", "sub_queries", "reasoning"],
 }
@@ -0,0 +1,14 @@
+"""Prompts for chat conversation summaries."""
+
+CHAT_SUMMARY_SYSTEM_PROMPT = (
+    "You are a helpful assistant that summarizes conversations."
+)
+
+# User prompt template for chat summaries
+# Placeholders: {conversation}
+CHAT_SUMMARY_PROMPT = """Summarize this conversation concisely (2-3 sentences max).
+
+CONVERSATION:
+{conversation}
+
+SUMMARY:"""
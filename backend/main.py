@@ -9,7 +9,7 @@ Entry point for the application. Configures:
 """
 
 import logging
-import uuid
+import secrets
 from contextlib import asynccontextmanager
 from pathlib import Path
 
@@ -26,6 +26,8 @@ from dependencies import (
     get_firestore_service,
     get_vector_store,
 )
+from llm import LLMError, LLMService
+from llm.anthropic import close_shared_client
 from middleware import RateLimitMiddleware
 from responses import ResponseCode, error_dict
 from router import router as api_router
@@ -53,6 +55,7 @@ async def lifespan(app: FastAPI):
         settings = get_settings()
         logger.info("Environment: %s", settings.environment)
         logger.info("LLM Model: %s", settings.llm_model)
+        logger.info("Query Analysis Model: %s", settings.query_analysis_model)
         logger.info("Embedding Model: %s", settings.embedding_model)
 
         # Validate critical services
@@ -87,6 +90,16 @@ async def lifespan(app: FastAPI):
             logger.error("Embedding service validation failed: %s", e)
             raise RuntimeError(f"Embedding service validation failed: {e}")
 
+        # Test LLM model IDs (a retired ID would fail every request)
+        llm = LLMService()
+        for model in (settings.llm_model, settings.query_analysis_model):
+            try:
+                await llm.check_model(model)
+            except LLMError as e:
+                logger.error("LLM model validation failed: %s", e)
+                raise RuntimeError(f"LLM model validation failed: {e}")
+        logger.info("✓ LLM models validated")
+
         logger.info("ContextQ started successfully")
 
     except Exception as e:
@@ -97,6 +110,7 @@ async def lifespan(app: FastAPI):
 
     # Shutdown
     logger.info("Shutting down ContextQ...")
+    await close_shared_client()
 
 
 # Create FastAPI app with lifespan
@@ -119,7 +133,7 @@ app.add_middleware(RateLimitMiddleware)
 @app.middleware("http")
 async def add_request_id(request: Request, call_next):
     """Add request ID to all requests for tracing."""
-    request_id = str(uuid.uuid4())[:8]
+    request_id = secrets.token_hex(4)
     request.state.request_id = request_id
 
     response = await call_next(request)
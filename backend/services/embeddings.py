@@ -1,7 +1,7 @@
 """Embedding service for generating vector embeddings via Voyage AI.
 
 Features:
-- Batch processing for efficiency
+- Batch processing for efficiency (batches sent concurrently, bounded)
 - Automatic retry with exponential backoff
 - In-memory caching to reduce API calls
 - Free tier: 200M tokens
@@ -13,6 +13,7 @@ KNOWN LIMITATIONS:
 - Retry logic uses asyncio.sleep() for non-blocking backoff.
 """
 
+import asyncio
 import hashlib
 import logging
 import time
@@ -121,14 +122,25 @@ class EmbeddingService:
         if not texts:
             return []
 
-        all_embeddings: list[list[float]] = []
+        batches = [
+            texts[i : i + self.batch_size]
+            for i in range(0, len(texts), self.batch_size)
+        ]
+        if len(batches) == 1:
+            return await self._embed_batch_async(batches[0], retry_count)
 
-        for i in range(0, len(texts), self.batch_size):
-            batch = texts[i : i + self.batch_size]
-            batch_embeddings = await self._embed_batch_async(batch, retry_count)
-            all_embeddings.extend(batch_embeddings)
+        # Batches are independent API calls - keep a few in flight at once
+        semaphore = asyncio.Semaphore(self.settings.embedding_max_concurrency)
 
-        return all_embeddings
+        async def embed_batch(batch: list[str]) -> list[list[float]]:
+            async with semaphore:
+                return await self._embed_batch_async(batch, retry_count)
+
+        # gather preserves input order, so embeddings line up with texts
+        results = await asyncio.gather(*(embed_batch(batch) for batch in batches))
+        return [
+            embedding for batch_embeddings in results for embedding in batch_embeddings
+        ]
 
     async def embed_text(self, text: str, retry_count: int = 3) -> list[float]:
         """Generate embedding for a single text.
@@ -160,6 +172,39 @@ class EmbeddingService:
 
         return embedding
 
+    async def embed_texts_cached(
+        self,
+        texts: list[str],
+        retry_count: int = 3,
+    ) -> list[list[float]]:
+        """Generate embeddings for short query texts, reusing cached vectors.
+
+        Only cache misses are sent to the API (in a single batch). Intended
+        for questions and sub-queries, not document chunks.
+
+        Args:
+            texts: List of text strings to embed.
+            retry_count: Number of retry attempts on failure.
+
+        Returns:
+            List of embedding vectors in the same order as texts.
+        """
+        if texts is None:
+            raise ValueError("texts cannot be None")
+
+        results: list[list[float] | None] = [self._cache.get(t) for t in texts]
+        missing = [i for i, emb in enumerate(results) if emb is None]
+
+        if missing:
+            embeddings = await self.embed_texts(
+                [texts[i] for i in missing], retry_count
+            )
+            for i, embedding in zip(missing, embeddings, strict=True):
+                self._cache.set(texts[i], embedding)
+                results[i] = embedding
+
+        return results
+
     async def _embed_batch_async(
         self,
         texts: list[str],
@@ -169,14 +214,12 @@ class EmbeddingService:
 
         Uses asyncio.sleep() for non-blocking backoff instead of time.sleep().
         """
-        import asyncio
-
         last_error: Exception | None = None
         backoff_times = [1, 2, 4]
 
         for attempt in range(retry_count):
             try:
-                start_time = time.time()
+                start_time = time.perf_counter()
                 # Run blocking API call in thread pool
                 result = await asyncio.to_thread(
                     self.client.embed,
@@ -184,7 +227,7 @@ class EmbeddingService:
                     model=self.model,
                     input_type="document",
                 )
-                elapsed = time.time() - start_time
+                elapsed = time.perf_counter() - start_time
                 logger.debug("Generated %d embeddings in %.2fs", len(texts), elapsed)
                 return result.embeddings
 
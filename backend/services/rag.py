@@ -11,18 +11,27 @@ This service does NOT handle:
 - Routing decisions (handled by caller)
 """
 
+import asyncio
+import heapq
 import logging
 from collections.abc import AsyncGenerator
+from itertools import chain
 from typing import Any
 
 from config import get_settings
 from llm import LLMError, LLMService
-from llm.prompts import DOCUMENT_QA_SYSTEM_PROMPT
+from llm.prompts import DOCUMENT_QA_PROMPT, DOCUMENT_QA_SYSTEM_PROMPT
 from services.embeddings import EmbeddingService
 from services.vector_store import RetrievedChunk, VectorStoreService
 
 logger = logging.getLogger(__name__)
 
+# Rough characters-per-token ratio used to estimate prompt size
+_CHARS_PER_TOKEN = 4
+
+# Separator between sources in the prompt context
+_CONTEXT_SEPARATOR = "\n\n---\n\n"
+
 
 __all__ = ["RAGService", "RAGError", "LLMError"]
 
@@ -40,23 +49,61 @@ class RAGService:
     1. Embed the question
     2. Search for relevant chunks
     3. Stream LLM response with context
+
+    retrieve() runs steps 1-2 on their own so callers can start retrieval
+    early and pass the chunks to retrieve_and_generate().
     """
 
     def __init__(
         self,
         embedding_service: EmbeddingService,
         vector_store: VectorStoreService,
+        llm: LLMService | None = None,
     ) -> None:
         """Initialize RAG service."""
         self.settings = get_settings()
         self.embedding_service = embedding_service
         self.vector_store = vector_store
-        self._llm = LLMService()
+        self._llm = llm or LLMService()
 
     async def get_session_documents(self, session_id: str):
         """Get documents for a session (passthrough to vector store)."""
         return await self.vector_store.get_session_documents(session_id)
 
+    async def retrieve(
+        self,
+        message: str,
+        session_id: str,
+        doc_ids: list[str] | None = None,
+        sub_queries: list[str] | None = None,
+    ) -> list[RetrievedChunk]:
+        """Retrieve relevant chunks for a question (no generation).
+
+        Args:
+            message: User's question.
+            session_id: Session identifier.
+            doc_ids: Document IDs to search.
+            sub_queries: Optional sub-queries for decomposition.
+
+        Returns:
+            Chunks that cleared the relevance threshold.
+        """
+        if not message or not message.strip():
+            raise ValueError("Message cannot be empty")
+        if not session_id:
+            raise ValueError("Session ID is required")
+
+        try:
+            chunks = await self._retrieve_chunks(
+                message.strip(), session_id, doc_ids or [], sub_queries
+            )
+        except Exception as e:
+            logger.error("Retrieval failed: %s", e)
+            raise RAGError(f"Retrieval failed: {e}") from e
+
+        self._log_retrieval_metrics(chunks, self.settings.min_relevance_score)
+        return chunks
+
     async def retrieve_and_generate(
         self,
         message: str,
@@ -64,6 +111,7 @@ class RAGService:
         chat_history: str = "",
         doc_ids: list[str] | None = None,
         sub_queries: list[str] | None = None,
+        chunks: list[RetrievedChunk] | None = None,
     ) -> AsyncGenerator[dict[str, Any], None]:
         """Retrieve relevant chunks and stream LLM response.
 
@@ -73,6 +121,7 @@ class RAGService:
             chat_history: Formatted chat history context.
             doc_ids: Document IDs to search.
             sub_queries: Optional sub-queries for decomposition.
+            chunks: Chunks from an earlier retrieve() call (skips retrieval).
 
         Yields:
             Stream chunks: 'sources', 'content', 'done'.
@@ -85,34 +134,12 @@ class RAGService:
         message = message.strip()
 
         try:
-            # 1. Retrieve chunks
-            chunks = await self._retrieve_chunks(
-                message, session_id, doc_ids or [], sub_queries
-            )
+            # 1. Retrieve chunks (unless the caller already did)
+            if chunks is None:
+                chunks = await self.retrieve(message, session_id, doc_ids, sub_queries)
 
-            # 2. Filter by relevance
+            # 2. Bail out if nothing cleared the relevance threshold
             if not chunks:
-                yield {
-                    "type": "sources",
-                    "sources": [],
-                }
-                yield {
-                    "type": "content",
-                    "content": "I couldn't find any relevant information in the uploaded documents.",
-                }
-                yield {
-                    "type": "done",
-                    "full_answer": "I couldn't find any relevant information.",
-                    "sources": [],
-                }
-                return
-
-            min_score = self.settings.min_relevance_score
-            relevant_chunks = [c for c in chunks if c.score >= min_score]
-
-            self._log_retrieval_metrics(chunks, relevant_chunks, min_score)
-
-            if not relevant_chunks:
                 yield {"type": "sources", "sources": []}
                 yield {
                     "type": "content",
@@ -125,9 +152,9 @@ class RAGService:
                 }
                 return
 
-            # 3. Build context and sources
-            context = self._build_context(relevant_chunks)
-            sources = self._chunks_to_source_dicts(relevant_chunks)
+            # 3. Build context and sources (best chunks first, within budget)
+            chunks = self._fit_context_budget(chunks)
+            context, sources = self._build_context_and_sources(chunks)
 
             # 4. Yield sources
             yield {"type": "sources", "sources": sources}
@@ -156,7 +183,11 @@ class RAGService:
         doc_ids: list[str],
         sub_queries: list[str] | None = None,
     ) -> list[RetrievedChunk]:
-        """Retrieve chunks, optionally using decomposition."""
+        """Retrieve chunks, optionally using decomposition.
+
+        The relevance threshold is applied by the vector store, so only
+        chunks scoring at least min_relevance_score are returned.
+        """
         if sub_queries:
             return await self._retrieve_with_decomposition(
                 message, sub_queries, session_id, doc_ids
@@ -167,6 +198,7 @@ class RAGService:
                 query_embedding=query_embedding,
                 session_id=session_id,
                 doc_ids=doc_ids,
+                score_threshold=self.settings.min_relevance_score,
             )
 
     async def _retrieve_with_decomposition(
@@ -177,68 +209,114 @@ class RAGService:
         doc_ids: list[str],
     ) -> list[RetrievedChunk]:
         """Retrieve chunks using query decomposition."""
-        all_chunks: list[RetrievedChunk] = []
-        seen_chunk_ids: set[str] = set()
+        best: dict[tuple[str, int], RetrievedChunk] = {}
         top_k = self.settings.decomposition_top_k
 
-        # Embed all queries at once
+        # Embed all queries at once (cached vectors are reused)
         queries = [original_message] + sub_queries
-        embeddings = await self.embedding_service.embed_texts(queries)
-
-        for _query, embedding in zip(queries, embeddings, strict=False):
-            chunks = await self.vector_store.search(
-                query_embedding=embedding,
-                session_id=session_id,
-                doc_ids=doc_ids,
-                top_k=top_k,
+        embeddings = await self.embedding_service.embed_texts_cached(queries)
+
+        # Run all searches concurrently - latency is max(RTT), not sum(RTT)
+        results = await asyncio.gather(
+            *(
+                self.vector_store.search(
+                    query_embedding=embedding,
+                    session_id=session_id,
+                    doc_ids=doc_ids,
+                    top_k=top_k,
+                    score_threshold=self.settings.min_relevance_score,
+                )
+                for embedding in embeddings
             )
+        )
 
-            for chunk in chunks:
-                chunk_id = f"{chunk.doc_id}_{chunk.chunk_index}"
-                if chunk_id not in seen_chunk_ids:
-                    seen_chunk_ids.add(chunk_id)
-                    all_chunks.append(chunk)
+        # Dedup across queries, keeping the best score seen for each chunk
+        for chunk in chain.from_iterable(results):
+            key = (chunk.doc_id, chunk.chunk_index)
+            current = best.get(key)
+            if current is None or chunk.score > current.score:
+                best[key] = chunk
 
-        # Sort by score, limit results
-        all_chunks.sort(key=lambda x: x.score, reverse=True)
         max_total = self.settings.retrieval_top_k * 2
 
         logger.info(
             "Decomposition: %d unique chunks (limited to %d)",
-            len(all_chunks),
+            len(best),
             max_total,
         )
 
-        return all_chunks[:max_total]
+        return heapq.nlargest(max_total, best.values(), key=lambda x: x.score)
 
     def _log_retrieval_metrics(
         self,
-        all_chunks: list[RetrievedChunk],
-        relevant_chunks: list[RetrievedChunk],
+        chunks: list[RetrievedChunk],
         threshold: float,
     ) -> None:
         """Log retrieval quality metrics."""
-        if all_chunks:
-            scores = [c.score for c in all_chunks]
+        if chunks:
             logger.info(
-                "Retrieval: total=%d, relevant=%d (threshold=%.2f), scores=[%.3f-%.3f]",
-                len(all_chunks),
-                len(relevant_chunks),
+                "Retrieval: relevant=%d (threshold=%.2f), scores=[%.3f-%.3f]",
+                len(chunks),
                 threshold,
-                min(scores),
-                max(scores),
+                min(c.score for c in chunks),
+                max(c.score for c in chunks),
             )
+        else:
+            logger.info("Retrieval: no chunks above threshold=%.2f", threshold)
+
+    def _fit_context_budget(
+        self,
+        chunks: list[RetrievedChunk],
+    ) -> list[RetrievedChunk]:
+        """Keep the highest-scoring chunks that fit the context token budget.
 
-    def _build_context(self, chunks: list[RetrievedChunk]) -> str:
-        """Build context string from chunks."""
+        Tokens are estimated at ~4 characters each. The top chunk is always
+        kept so a single oversized chunk still produces an answer.
+        """
+        budget = self.settings.context_token_budget * _CHARS_PER_TOKEN
+        ordered = sorted(chunks, key=lambda c: c.score, reverse=True)
+
+        kept: list[RetrievedChunk] = []
+        used = 0
+        for chunk in ordered:
+            used += len(chunk.text)
+            if kept and used > budget:
+                break
+            kept.append(chunk)
+
+        if len(kept) < len(ordered):
+            logger.info("Context budget: kept %d of %d chunks", len(kept), len(ordered))
+        return kept
+
+    def _build_context_and_sources(
+        self,
+        chunks: list[RetrievedChunk],
+    ) -> tuple[str, list[dict[str, Any]]]:
+        """Build the context string and API source dicts in a single pass."""
         parts = []
+        sources = []
         for i, chunk in enumerate(chunks, 1):
-            source = f"[Source {i}: {chunk.filename}"
+            text = chunk.text
+            if parts:
+                parts.append(_CONTEXT_SEPARATOR)
             if chunk.page_number:
-                source += f", page {chunk.page_number}"
-            source += "]"
-            parts.append(f"{source}\n{chunk.text}")
-        return "\n\n---\n\n".join(parts)
+                parts.append(
+                    f"[Source {i}: {chunk.filename}, page {chunk.page_number}]\n"
+                )
+            else:
+                parts.append(f"[Source {i}: {chunk.filename}]\n")
+            # Chunk text goes in as its own part so it's copied only once
+            parts.append(text)
+            sources.append(
+                {
+                    "text": text if len(text) <= 500 else text[:500] + "...",
+                    "filename": chunk.filename,
+                    "page_number": chunk.page_number,
+                    "chunk_index": chunk.chunk_index,
+                    "relevance_score": round(chunk.score, 4),
+                }
+            )
+        return "".join(parts), sources
 
     def _build_prompt(
         self,
@@ -248,27 +326,8 @@ class RAGService:
     ) -> str:
         """Build RAG prompt."""
         history = f"CONVERSATION HISTORY:\n{chat_history}\n\n" if chat_history else ""
-        return f"""{history}Based on the following document excerpts, please answer the question.
-
-DOCUMENT CONTEXT:
-{context}
-
-QUESTION: {message}
-
-Please provide a clear, accurate answer based only on the information in the documents above."""
-
-    def _chunks_to_source_dicts(
-        self,
-        chunks: list[RetrievedChunk],
-    ) -> list[dict[str, Any]]:
-        """Convert chunks to source dicts for API response."""
-        return [
-            {
-                "text": c.text[:500] + "..." if len(c.text) > 500 else c.text,
-                "filename": c.filename,
-                "page_number": c.page_number,
-                "chunk_index": c.chunk_index,
-                "relevance_score": round(c.score, 4),
-            }
-            for c in chunks
-        ]
+        return DOCUMENT_QA_PROMPT.format(
+            history_section=history,
+            context=context,
+            question=message,
+        )
@@ -19,8 +19,23 @@ from config import get_settings
 
 logger = logging.getLogger(__name__)
 
-
-@dataclass
+# Search the int8-quantized index, then rescore an oversampled candidate set
+# with the original float vectors so ranking quality is preserved.
+_SEARCH_PARAMS = qdrant_models.SearchParams(
+    quantization=qdrant_models.QuantizationSearchParams(
+        rescore=True,
+        oversampling=2.0,
+    )
+)
+
+# Recently seen (session_id, hash field, hash) -> doc_id, so repeat uploads
+# skip the Qdrant lookup. Entries expire so deletes made by other replicas
+# can't make a document look uploaded for long.
+_HASH_CACHE_SIZE = 10000
+_HASH_CACHE_TTL_SECONDS = 600.0
+
+
+@dataclass(slots=True)
 class RetrievedChunk:
     """A chunk retrieved from vector search with relevance score."""
 
@@ -63,6 +78,7 @@ class VectorStoreService:
         self.collection_name = self.settings.qdrant_collection
         self.vector_size = self.settings.embedding_dimensions
         self._initialized = False
+        self._known_hashes: dict[tuple[str, str, str], tuple[float, str]] = {}
 
     async def initialize(self) -> None:
         """Initialize collection if it doesn't exist."""
@@ -79,7 +95,21 @@ class VectorStoreService:
                     collection_name=self.collection_name,
                     vectors_config=qdrant_models.VectorParams(
                         size=self.vector_size,
+                        # Qdrant normalizes vectors on write for COSINE and
+                        # scores with a plain dot product, so no client-side
+                        # normalization (or switch to DOT) is needed.
                         distance=qdrant_models.Distance.COSINE,
+                        # Originals live on disk (memmapped) and are only read
+                        # when rescoring the quantized candidates
+                        on_disk=True,
+                    ),
+                    # int8 scalar quantization: 4x smaller copy kept in RAM
+                    quantization_config=qdrant_models.ScalarQuantization(
+                        scalar=qdrant_models.ScalarQuantizationConfig(
+                            type=qdrant_models.ScalarType.INT8,
+                            quantile=0.99,
+                            always_ram=True,
+                        )
                     ),
                 )
 
@@ -98,6 +128,11 @@ class VectorStoreService:
                     field_name="content_hash",
                     field_schema=qdrant_models.PayloadSchemaType.KEYWORD,
                 )
+                await self.client.create_payload_index(
+                    collection_name=self.collection_name,
+                    field_name="file_hash",
+                    field_schema=qdrant_models.PayloadSchemaType.KEYWORD,
+                )
 
                 logger.info("Collection created with payload indexes")
 
@@ -111,12 +146,14 @@ class VectorStoreService:
         self,
         content_hash: str,
         session_id: str,
+        field: str = "content_hash",
     ) -> str | None:
         """Check if a document with this content hash already exists.
 
         Args:
             content_hash: SHA256 hash of document content.
             session_id: Session identifier.
+            field: Payload field to match ("content_hash" or "file_hash").
 
         Returns:
             Document ID if exists, None otherwise.
@@ -127,6 +164,10 @@ class VectorStoreService:
         if not content_hash or not session_id:
             raise ValueError("content_hash and session_id are required")
 
+        cached_doc_id = self._known_doc_id(session_id, field, content_hash)
+        if cached_doc_id:
+            return cached_doc_id
+
         try:
             await self.initialize()
 
@@ -139,7 +180,7 @@ class VectorStoreService:
                             match=qdrant_models.MatchValue(value=session_id),
                         ),
                         qdrant_models.FieldCondition(
-                            key="content_hash",
+                            key=field,
                             match=qdrant_models.MatchValue(value=content_hash),
                         ),
                     ]
@@ -148,13 +189,45 @@ class VectorStoreService:
             )
 
             if results[0]:
-                return results[0][0].payload.get("doc_id")
+                doc_id = results[0][0].payload.get("doc_id")
+                if doc_id:
+                    self._remember_hash(session_id, field, content_hash, doc_id)
+                return doc_id
             return None
 
         except Exception as e:
             logger.error("Error checking hash existence: %s", e)
             raise VectorStoreError(f"Failed to check document hash: {e}") from e
 
+    def _known_doc_id(self, session_id: str, field: str, value: str) -> str | None:
+        """Get a cached doc_id for a hash, if seen recently."""
+        key = (session_id, field, value)
+        entry = self._known_hashes.get(key)
+        if entry is None:
+            return None
+        expires_at, doc_id = entry
+        if expires_at < time.monotonic():
+            del self._known_hashes[key]
+            return None
+        return doc_id
+
+    def _remember_hash(
+        self, session_id: str, field: str, value: str, doc_id: str
+    ) -> None:
+        """Cache a hash -> doc_id mapping (oldest entry evicted when full)."""
+        key = (session_id, field, value)
+        if key not in self._known_hashes and (
+            len(self._known_hashes) >= _HASH_CACHE_SIZE
+        ):
+            del self._known_hashes[next(iter(self._known_hashes))]
+        self._known_hashes[key] = (time.monotonic() + _HASH_CACHE_TTL_SECONDS, doc_id)
+
+    def _forget_doc(self, doc_id: str) -> None:
+        """Drop cached hashes for a deleted document."""
+        stale = [k for k, (_, d) in self._known_hashes.items() if d == doc_id]
+        for key in stale:
+            del self._known_hashes[key]
+
     async def upsert_chunks(
         self,
         chunks: list[dict[str, object]],
@@ -190,7 +263,7 @@ class VectorStoreService:
             return 0
 
         try:
-            start_time = time.time()
+            start_time = time.perf_counter()
 
             points = []
             for i, (chunk, embedding) in enumerate(
@@ -206,6 +279,7 @@ class VectorStoreService:
                     "filename": metadata.get("filename", ""),
                     "document_type": metadata.get("document_type", ""),
                     "content_hash": metadata.get("content_hash", ""),
+                    "file_hash": metadata.get("file_hash", ""),
                     "upload_timestamp": metadata.get("upload_timestamp", ""),
                 }
 
@@ -222,11 +296,15 @@ class VectorStoreService:
                     collection_name=self.collection_name, points=batch
                 )
 
-            elapsed = time.time() - start_time
+            elapsed = time.perf_counter() - start_time
             logger.info(
                 "Upserted %d chunks for doc %s in %.2fs", len(points), doc_id, elapsed
             )
 
+            for field in ("content_hash", "file_hash"):
+                if metadata.get(field):
+                    self._remember_hash(session_id, field, metadata[field], doc_id)
+
             return len(points)
 
         except Exception as e:
@@ -239,6 +317,7 @@ class VectorStoreService:
         session_id: str,
         doc_ids: list[str] | None = None,
         top_k: int | None = None,
+        score_threshold: float | None = None,
     ) -> list[RetrievedChunk]:
         """Search for similar chunks.
 
@@ -247,6 +326,8 @@ class VectorStoreService:
             session_id: Session identifier.
             doc_ids: Optional list of document IDs to filter by.
             top_k: Number of results to return (defaults to settings.retrieval_top_k).
+            score_threshold: Optional minimum score; lower-scoring points are
+                filtered out server-side and never sent over the wire.
 
         Returns:
             List of RetrievedChunk objects sorted by relevance.
@@ -264,7 +345,7 @@ class VectorStoreService:
             top_k = self.settings.retrieval_top_k
 
         try:
-            start_time = time.time()
+            start_time = time.perf_counter()
 
             must_conditions = [
                 qdrant_models.FieldCondition(
@@ -285,11 +366,13 @@ class VectorStoreService:
                 collection_name=self.collection_name,
                 query=query_embedding,
                 query_filter=qdrant_models.Filter(must=must_conditions),
+                search_params=_SEARCH_PARAMS,
+                score_threshold=score_threshold,
                 limit=top_k,
                 with_payload=True,
             )
 
-            elapsed = time.time() - start_time
+            elapsed = time.perf_counter() - start_time
             logger.debug(
                 "Search returned %d results in %.3fs", len(results.points), elapsed
             )
@@ -367,6 +450,7 @@ class VectorStoreService:
                 ),
             )
 
+            self._forget_doc(doc_id)
             logger.info("Deleted %d chunks for doc %s", count, doc_id)
             return count
 
@@ -434,9 +518,9 @@ class VectorStoreService:
             Dict with status, latency_ms, and collections count.
         """
         try:
-            start_time = time.time()
+            start_time = time.perf_counter()
             collections = await self.client.get_collections()
-            latency = (time.time() - start_time) * 1000
+            latency = (time.perf_counter() - start_time) * 1000
 
             return {
                 "status": "healthy",
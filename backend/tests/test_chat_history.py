@@ -0,0 +1,104 @@
+"""Tests for chat history management."""
+
+import importlib
+import json
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+# The manager imports the Firestore service module
+pytest.importorskip("firebase_admin")
+
+from apps.chat.chat_history import ChatHistoryManager
+
+
+class TestMessageCountTracking:
+    """Tests for ChatHistoryManager's in-memory message counts."""
+
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.firestore = AsyncMock()
+        settings = MagicMock(summary_trigger_threshold=10, summary_trigger_interval=5)
+        self.manager = ChatHistoryManager(self.firestore, AsyncMock(), settings)
+
+    async def test_estimate_skips_count_when_not_due(self):
+        """Test a tracked count that isn't due skips the Firestore count."""
+        self.manager._track_message_count("chat", 12)
+
+        await self.manager.maybe_generate_summary("chat")
+
+        self.firestore.get_message_count.assert_not_awaited()
+
+    async def test_forget_chat_rereads_count(self):
+        """Test a cleared chat's count is re-read instead of trusted."""
+        self.manager._track_message_count("chat", 12)
+        self.firestore.get_message_count.return_value = 2
+
+        self.manager.forget_chat("chat")
+        await self.manager.maybe_generate_summary("chat")
+
+        self.firestore.get_message_count.assert_awaited_once_with("chat")
+        assert self.manager._message_counts["chat"][0] == 2
+
+    async def test_stale_estimate_rereads_count(self):
+        """Test messages saved by another instance are picked up on expiry."""
+        self.manager._track_message_count("chat", 12)
+        # Another replica saved 4 more messages - the summary is now due
+        self.firestore.get_message_count.return_value = 16
+        self.firestore.get_messages.return_value = [{"role": "user", "content": "hi"}]
+
+        await self.manager.maybe_generate_summary("chat")
+        self.firestore.get_message_count.assert_not_awaited()
+
+        # The estimate expires and the next check re-reads the real count
+        count, _ = self.manager._message_counts["chat"]
+        self.manager._message_counts["chat"] = (count, time.monotonic() - 1)
+        await self.manager.maybe_generate_summary("chat")
+
+        self.firestore.get_message_count.assert_awaited_once_with("chat")
+        self.firestore.save_summary.assert_awaited_once()
+
+
+class TestStreamChatHistory:
+    """Tests for the NDJSON chat history stream."""
+
+    async def test_failure_ends_with_error_line(self):
+        """Test a mid-stream failure is reported as a final error line."""
+        handler = importlib.import_module("apps.chat.handlers.stream_chat_history")
+
+        async def messages(chat_id, limit=None, after=None):
+            yield {"id": "m1", "role": "user", "content": "hi"}
+            raise RuntimeError("boom")
+
+        firestore = MagicMock(stream_messages=messages)
+        with patch.object(handler, "get_firestore_service", return_value=firestore):
+            response = await handler.stream_chat_history("chat", None, None)
+            lines = [line async for line in response.body_iterator]
+
+        assert json.loads(lines[0])["id"] == "m1"
+        assert json.loads(lines[-1]) == {
+            "type": "error",
+            "error": "Failed to stream chat history: boom",
+        }
+
+
+class TestGetChatHistory:
+    """Tests for the paged chat history endpoint."""
+
+    @pytest.mark.parametrize("limit", [0, -1, 501])
+    def test_out_of_range_limit_rejected(self, limit):
+        """Test a limit outside 1-500 is a validation error, not a Firestore 500."""
+        handler = importlib.import_module("apps.chat.handlers.get_chat_history")
+        app = FastAPI()
+        app.get("/history")(handler.get_chat_history)
+
+        with patch.object(handler, "get_firestore_service") as get_firestore:
+            response = TestClient(app).get(
+                "/history", params={"chat_id": "chat", "limit": limit}
+            )
+
+        assert response.status_code == 422
+        get_firestore.return_value.get_messages.assert_not_called()
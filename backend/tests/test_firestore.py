@@ -0,0 +1,39 @@
+"""Tests for the Firestore chat history service."""
+
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+pytest.importorskip("firebase_admin")
+
+from db.firestore import FirestoreService
+
+
+class TestMessageCursors:
+    """Tests for message paging cursors."""
+
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.service = object.__new__(FirestoreService)
+        self.service.db = MagicMock()
+        self.collection = (
+            self.service.db.collection.return_value.document.return_value.collection
+        ).return_value
+        self.collection.document.return_value.get = AsyncMock(
+            return_value=SimpleNamespace(exists=False)
+        )
+
+    async def test_unknown_before_cursor_returns_nothing(self):
+        """Test an unknown cursor ends paging instead of repeating the newest page."""
+        messages = await self.service.get_messages("chat", limit=10, before="gone")
+
+        assert messages == []
+        self.collection.order_by.return_value.limit.assert_not_called()
+
+    async def test_unknown_after_cursor_streams_nothing(self):
+        """Test an unknown cursor doesn't replay the chat from the start."""
+        messages = [m async for m in self.service.stream_messages("chat", after="gone")]
+
+        assert messages == []
+        self.collection.order_by.return_value.stream.assert_not_called()
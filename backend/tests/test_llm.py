@@ -0,0 +1,82 @@
+"""Tests for the Anthropic LLM service."""
+
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import httpx
+import pytest
+from anthropic import APIError
+
+from config import get_settings
+from llm.anthropic import AnthropicService
+from llm.base import LLMError
+
+
+class TestGenerateStructuredOutput:
+    """Tests for AnthropicService.generate_structured_output."""
+
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.service = AnthropicService()
+        self.service._client = AsyncMock()
+
+    def _respond(self, stop_reason: str) -> None:
+        block = SimpleNamespace(type="tool_use", name="tool", input={"a": 1})
+        self.service._client.messages.create.return_value = SimpleNamespace(
+            stop_reason=stop_reason, content=[block]
+        )
+
+    async def test_returns_tool_input(self):
+        """Test a complete tool call returns its input."""
+        self._respond("tool_use")
+
+        result = await self.service.generate_structured_output(
+            "prompt", "system", "tool", {}
+        )
+
+        assert result == {"a": 1}
+
+    async def test_defaults_to_query_analysis_model(self):
+        """Test the configured analysis model is used when none is passed."""
+        self._respond("tool_use")
+
+        await self.service.generate_structured_output("prompt", "system", "tool", {})
+
+        _, kwargs = self.service._client.messages.create.call_args
+        assert kwargs["model"] == get_settings().query_analysis_model
+
+    async def test_truncated_tool_call_raises(self):
+        """Test output cut off at max_tokens is an error, not a partial result."""
+        self._respond("max_tokens")
+
+        with pytest.raises(LLMError):
+            await self.service.generate_structured_output(
+                "prompt", "system", "tool", {}
+            )
+
+
+class TestCheckModel:
+    """Tests for AnthropicService.check_model."""
+
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.service = AnthropicService()
+        self.service._client = AsyncMock()
+
+    async def test_served_model_passes(self):
+        """Test a model the API knows about passes the check."""
+        await self.service.check_model("claude-haiku-4-5")
+
+        self.service._client.models.retrieve.assert_awaited_once_with(
+            "claude-haiku-4-5"
+        )
+
+    async def test_unknown_model_raises(self):
+        """Test a retired or mistyped model ID is reported as an LLMError."""
+        request = httpx.Request("GET", "https://api.anthropic.com/v1/models/x")
+        self.service._client.models.retrieve.side_effect = APIError(
+            "not found", request, body=None
+        )
+
+        with pytest.raises(LLMError, match="claude-3-5-haiku-20241022"):
+            await self.service.check_model("claude-3-5-haiku-20241022")
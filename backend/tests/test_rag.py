@@ -0,0 +1,132 @@
+"""Tests for the RAG service."""
+
+from unittest.mock import AsyncMock, Mock
+
+from services.rag import RAGService
+from services.vector_store import RetrievedChunk
+
+
+def _chunk(doc_id: str, chunk_index: int, score: float) -> RetrievedChunk:
+    return RetrievedChunk(
+        text=f"text {doc_id}-{chunk_index}",
+        filename=f"{doc_id}.pdf",
+        page_number=1,
+        chunk_index=chunk_index,
+        doc_id=doc_id,
+        score=score,
+    )
+
+
+class TestRetrieveWithDecomposition:
+    """Tests for RAGService._retrieve_with_decomposition."""
+
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.embedding_service = AsyncMock()
+        self.embedding_service.embed_texts_cached.return_value = [[0.1], [0.2]]
+        self.vector_store = AsyncMock()
+        self.rag = RAGService(self.embedding_service, self.vector_store)
+
+    async def test_dedup_keeps_highest_score(self):
+        """Test duplicate chunks across queries keep their best score."""
+        self.vector_store.search.side_effect = [
+            [_chunk("a", 0, 0.5), _chunk("b", 0, 0.4)],
+            [_chunk("a", 0, 0.9)],
+        ]
+
+        result = await self.rag._retrieve_with_decomposition(
+            "compare a and b", ["what is a"], "session", ["a", "b"]
+        )
+
+        assert [(c.doc_id, c.score) for c in result] == [("a", 0.9), ("b", 0.4)]
+
+    async def test_limits_total_chunks(self):
+        """Test results are capped at retrieval_top_k * 2, best first."""
+        max_total = self.rag.settings.retrieval_top_k * 2
+        chunks = [_chunk("a", i, i / 100) for i in range(max_total + 3)]
+        self.vector_store.search.side_effect = [chunks, []]
+
+        result = await self.rag._retrieve_with_decomposition(
+            "question", ["sub"], "session", ["a"]
+        )
+
+        assert len(result) == max_total
+        assert result[0].score == max(c.score for c in chunks)
+
+
+class TestFitContextBudget:
+    """Tests for RAGService._fit_context_budget."""
+
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.rag = RAGService(AsyncMock(), AsyncMock())
+
+    def _with_budget(self, tokens: int) -> None:
+        self.rag.settings = self.rag.settings.model_copy(
+            update={"context_token_budget": tokens}
+        )
+
+    def test_keeps_best_chunks_within_budget(self):
+        """Test lowest-scoring chunks are dropped once the budget is spent."""
+        self._with_budget(4)  # ~16 chars: two 8-char chunks
+        chunks = [_chunk("a", 0, 0.5), _chunk("a", 1, 0.9), _chunk("a", 2, 0.7)]
+
+        result = self.rag._fit_context_budget(chunks)
+
+        assert [c.score for c in result] == [0.9, 0.7]
+
+    def test_always_keeps_top_chunk(self):
+        """Test a single oversized chunk is still returned."""
+        self._with_budget(1)
+        chunks = [_chunk("a", 0, 0.5), _chunk("a", 1, 0.9)]
+
+        result = self.rag._fit_context_budget(chunks)
+
+        assert [c.score for c in result] == [0.9]
+
+
+class TestBuildContextAndSources:
+    """Tests for RAGService._build_context_and_sources."""
+
+    def test_context_and_sources_match(self):
+        """Test context labels and source dicts line up with the chunks."""
+        rag = RAGService(AsyncMock(), AsyncMock())
+        long_chunk = _chunk("b", 1, 0.12345)
+        long_chunk.text = "x" * 600
+
+        context, sources = rag._build_context_and_sources(
+            [_chunk("a", 0, 0.9), long_chunk]
+        )
+
+        assert context.startswith("[Source 1: a.pdf, page 1]\ntext a-0")
+        assert "text a-0\n\n---\n\n[Source 2: b.pdf, page 1]\n" in context
+        assert context.endswith("x" * 600)
+        assert [s["filename"] for s in sources] == ["a.pdf", "b.pdf"]
+        assert sources[1]["text"] == "x" * 500 + "..."
+        assert sources[1]["relevance_score"] == 0.1235
+
+
+class TestRetrieveAndGenerate:
+    """Tests for RAGService.retrieve_and_generate."""
+
+    async def test_prefetched_chunks_skip_retrieval(self):
+        """Test chunks from an earlier retrieve() are used as-is."""
+        embedding_service = AsyncMock()
+        llm = Mock()
+
+        async def fake_stream(prompt, system):
+            yield "answer"
+
+        llm.stream = fake_stream
+        rag = RAGService(embedding_service, AsyncMock(), llm=llm)
+
+        events = [
+            event
+            async for event in rag.retrieve_and_generate(
+                "question", "session", chunks=[_chunk("a", 0, 0.9)]
+            )
+        ]
+
+        embedding_service.embed_text.assert_not_called()
+        assert [e["type"] for e in events] == ["sources", "content", "done"]
+        assert events[-1]["full_answer"] == "answer"
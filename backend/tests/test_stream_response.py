@@ -0,0 +1,304 @@
+"""Tests for the chat streaming handler helpers."""
+
+import asyncio
+import importlib
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+# The handler module pulls in the Firestore client via dependencies
+pytest.importorskip("firebase_admin")
+
+from apps.chat.handlers.stream_response import (
+    ChatRequest,
+    _QueryAnalysis,
+    _StreamLimiter,
+)
+
+# The handlers package re-exports the handler function under the module's name
+handler = importlib.import_module("apps.chat.handlers.stream_response")
+
+
+def _analysis(skip_rag=False, needs_decomposition=False, sub_queries=None):
+    return _QueryAnalysis(
+        skip_rag=skip_rag,
+        needs_decomposition=needs_decomposition,
+        sub_queries=sub_queries or [],
+    )
+
+
+def _chat_mocks(analysis: _QueryAnalysis):
+    """Build a RAG service, history manager and analyzer for the handler."""
+    rag_service = AsyncMock()
+    rag_service.get_session_documents.return_value = [
+        SimpleNamespace(doc_id="doc-1", filename="a.pdf")
+    ]
+    chat_history_mgr = AsyncMock()
+    chat_history_mgr.get_context.return_value = ""
+    analyzer = AsyncMock()
+    analyzer.analyze.return_value = analysis
+    return rag_service, chat_history_mgr, analyzer
+
+
+class TestStreamLimiter:
+    """Tests for _StreamLimiter."""
+
+    async def test_cancelled_waiter_does_not_block_others(self):
+        """Test a waiter cancelled after a release doesn't strand the next one."""
+        limiter = _StreamLimiter(1)
+        release_a = asyncio.Event()
+        acquired = []
+
+        async def hold(name, event=None):
+            async with limiter.slot(name):
+                acquired.append(name)
+                if event:
+                    await event.wait()
+
+        a = asyncio.create_task(hold("a", release_a))
+        await asyncio.sleep(0)
+        b = asyncio.create_task(hold("b", asyncio.Event()))
+        c = asyncio.create_task(hold("c"))
+        await asyncio.sleep(0)
+
+        release_a.set()
+        await asyncio.sleep(0)
+        b.cancel()
+
+        await asyncio.wait_for(asyncio.gather(a, c), timeout=1)
+        assert "c" in acquired
+
+    async def test_analysis_waits_for_slot(self):
+        """Test query analysis only starts once a stream slot is free."""
+        limiter = _StreamLimiter(1)
+        rag_service, chat_history_mgr, analyzer = _chat_mocks(_analysis(skip_rag=True))
+        request = ChatRequest(question="what changed?", chat_id="chat")
+
+        with (
+            patch.object(handler, "_get_stream_limiter", return_value=limiter),
+            patch.object(handler, "_get_query_analyzer", return_value=analyzer),
+            patch.object(handler, "get_llm_service"),
+        ):
+            async with limiter.slot("other"):
+                response = await handler.stream_response(
+                    request, "session", rag_service, chat_history_mgr
+                )
+                first = asyncio.create_task(anext(response.body_iterator))
+                await asyncio.sleep(0.01)
+                analyzer.analyze.assert_not_awaited()
+
+            await asyncio.wait_for(first, timeout=1)
+            analyzer.analyze.assert_awaited_once()
+            await response.body_iterator.aclose()
+
+
+class TestQueryAnalyzerCache:
+    """Tests for _QueryAnalyzer result caching."""
+
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.llm = AsyncMock()
+        self.llm.generate_structured_output.return_value = {
+            "skip_rag": False,
+            "needs_decomposition": True,
+            "sub_queries": ["what is in a", "what is in b"],
+            "reasoning": "comparison",
+        }
+        with patch.object(handler, "get_llm_service", return_value=self.llm):
+            self.analyzer = handler._QueryAnalyzer()
+
+    async def test_repeat_question_hits_cache(self):
+        """Test an exact repeat in the same conversation reuses the analysis."""
+        history = "User: What is in A?"
+        first = await self.analyzer.analyze("Compare them", history, ["a.pdf", "b.pdf"])
+        second = await self.analyzer.analyze(
+            "Compare them", history, ["a.pdf", "b.pdf"]
+        )
+
+        assert second == first
+        self.llm.generate_structured_output.assert_awaited_once()
+
+    async def test_same_message_in_other_chat_misses_cache(self):
+        """Test a follow-up in another chat doesn't reuse this chat's routing."""
+        self.llm.generate_structured_output.side_effect = [
+            self.llm.generate_structured_output.return_value,
+            {
+                "skip_rag": True,
+                "needs_decomposition": False,
+                "sub_queries": [],
+                "reasoning": "follow-up about the previous answer",
+            },
+        ]
+
+        chat_a = await self.analyzer.analyze(
+            "Compare them", "User: What is in A and B?", ["a.pdf", "b.pdf"]
+        )
+        chat_b = await self.analyzer.analyze(
+            "Compare them", "User: Name two sorting algorithms", ["a.pdf", "b.pdf"]
+        )
+
+        assert self.llm.generate_structured_output.await_count == 2
+        assert chat_a.needs_decomposition
+        assert chat_b.skip_rag
+        assert not chat_b.sub_queries
+
+    async def test_uses_configured_model(self):
+        """Test analysis calls go to the configured query analysis model."""
+        await self.analyzer.analyze("Compare A and B", "", ["a.pdf", "b.pdf"])
+
+        _, kwargs = self.llm.generate_structured_output.call_args
+        assert kwargs["model"] == handler.get_settings().query_analysis_model
+
+    async def test_different_documents_miss_cache(self):
+        """Test the same question over a different document set is re-analyzed."""
+        await self.analyzer.analyze("Compare A and B", "", ["a.pdf", "b.pdf"])
+        await self.analyzer.analyze("Compare A and B", "", ["a.pdf", "c.pdf"])
+
+        assert self.llm.generate_structured_output.await_count == 2
+
+    async def test_failed_analysis_not_cached(self):
+        """Test fallback results from a failed analysis are not reused."""
+        self.llm.generate_structured_output.side_effect = [
+            RuntimeError("boom"),
+            self.llm.generate_structured_output.return_value,
+        ]
+
+        fallback = await self.analyzer.analyze("Compare A and B", "", ["a.pdf"])
+        retried = await self.analyzer.analyze("Compare A and B", "", ["a.pdf"])
+
+        assert not fallback.needs_decomposition
+        assert retried.needs_decomposition
+
+
+class TestCoalesceContent:
+    """Tests for _coalesce_content."""
+
+    async def test_flushes_buffer_before_upstream_error(self):
+        """Test buffered text is delivered before the upstream error."""
+
+        async def events():
+            yield {"type": "content", "content": "x"}
+            raise RuntimeError("boom")
+
+        received = []
+        with pytest.raises(RuntimeError, match="boom"):
+            async for event in handler._coalesce_content(events()):
+                received.append(event)
+
+        assert received == [{"type": "content", "content": "x"}]
+
+    async def test_closing_consumer_closes_upstream(self):
+        """Test the upstream generator is closed when the consumer stops early."""
+        closed = asyncio.Event()
+
+        async def events():
+            try:
+                yield {"type": "sources", "sources": []}
+                await asyncio.Event().wait()  # Stalled LLM stream
+            finally:
+                closed.set()
+
+        stream = handler._coalesce_content(events())
+        assert (await anext(stream))["type"] == "sources"
+        await stream.aclose()
+
+        assert closed.is_set()
+
+
+class TestPrepareChat:
+    """Tests for the speculative retrieval in _prepare_chat."""
+
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.retrieval_started = asyncio.Event()
+        self.retrieval_cancelled = asyncio.Event()
+        self.request = ChatRequest(question="what changed in a?", chat_id="chat")
+
+    async def _prepare(self, analysis):
+        rag_service, chat_history_mgr, analyzer = _chat_mocks(analysis)
+
+        async def retrieve(*args, **kwargs):
+            self.retrieval_started.set()
+            try:
+                await asyncio.Event().wait()  # Slow vector search
+            except asyncio.CancelledError:
+                self.retrieval_cancelled.set()
+                raise
+
+        async def analyze(*args, **kwargs):
+            # Analysis finishes while retrieval is still in flight
+            await self.retrieval_started.wait()
+            return analysis
+
+        rag_service.retrieve.side_effect = retrieve
+        analyzer.analyze.side_effect = analyze
+
+        with patch.object(handler, "_get_query_analyzer", return_value=analyzer):
+            return await handler._prepare_chat(
+                self.request, "session", "req", rag_service, chat_history_mgr
+            )
+
+    @pytest.mark.parametrize(
+        "analysis",
+        [
+            _analysis(skip_rag=True),
+            _analysis(needs_decomposition=True, sub_queries=["a", "b"]),
+        ],
+        ids=["skip_rag", "decomposed"],
+    )
+    async def test_speculative_retrieval_discarded(self, analysis):
+        """Test plain retrieval is cancelled when its result won't be used."""
+        prepared = await asyncio.wait_for(self._prepare(analysis), timeout=1)
+
+        assert prepared.retrieval_task is None
+        await asyncio.wait_for(self.retrieval_cancelled.wait(), timeout=1)
+
+    async def test_speculative_retrieval_kept_for_plain_rag(self):
+        """Test plain retrieval is handed over for a non-decomposed RAG answer."""
+        prepared = await asyncio.wait_for(self._prepare(_analysis()), timeout=1)
+
+        assert prepared.retrieval_task is not None
+        assert not prepared.retrieval_task.done()
+        prepared.retrieval_task.cancel()
+        await asyncio.wait([prepared.retrieval_task])
+
+
+class TestGreetingReply:
+    """Tests for the canned greeting replies."""
+
+    def test_first_greeting_lists_documents(self):
+        """Test a first greeting names the session's documents."""
+        reply = handler._greeting_reply("hi", ["a.pdf", "b.docx"], "")
+
+        assert reply == (
+            "Hi! You've uploaded 2 document(s): a.pdf, b.docx. "
+            "Ask me anything about them."
+        )
+
+    def test_greeting_without_documents_asks_for_upload(self):
+        """Test the upload prompt is only shown when nothing is uploaded."""
+        assert "Upload" in handler._greeting_reply("hello", [], "")
+
+    def test_greeting_mid_conversation_is_not_a_welcome(self):
+        """Test a greeting in an ongoing chat skips the introduction."""
+        reply = handler._greeting_reply("hey!", ["a.pdf"], "User: What is in A?")
+
+        assert reply == handler._GREETING_AGAIN_REPLY
+
+    async def test_prepared_greeting_keeps_context(self):
+        """Test greetings skip analysis but still load history and documents."""
+        rag_service, chat_history_mgr, analyzer = _chat_mocks(_analysis())
+        chat_history_mgr.get_context.return_value = "User: What is in A?"
+        request = ChatRequest(question="hi", chat_id="chat")
+
+        with patch.object(handler, "_get_query_analyzer", return_value=analyzer):
+            prepared = await handler._prepare_chat(
+                request, "session", "req", rag_service, chat_history_mgr
+            )
+        await prepared.user_message_saved
+
+        assert prepared.is_greeting
+        assert prepared.doc_names == ["a.pdf"]
+        assert prepared.chat_history == "User: What is in A?"
+        analyzer.analyze.assert_not_awaited()
@@ -0,0 +1,41 @@
+"""Tests for the vector store service."""
+
+from unittest.mock import AsyncMock, patch
+
+from services.vector_store import VectorStoreService
+
+
+class TestHashCache:
+    """Tests for VectorStoreService duplicate-hash caching."""
+
+    def setup_method(self):
+        """Set up test fixtures."""
+        with patch("services.vector_store.AsyncQdrantClient", AsyncMock):
+            self.store = VectorStoreService()
+        self.store._initialized = True
+
+    async def test_upserted_hash_skips_lookup(self):
+        """Test a just-uploaded document is found without querying Qdrant."""
+        await self.store.upsert_chunks(
+            chunks=[{"text": "t", "chunk_index": 0}],
+            embeddings=[[0.1]],
+            doc_id="doc-1",
+            session_id="session",
+            metadata={"content_hash": "abc", "file_hash": "def"},
+        )
+
+        assert await self.store.check_hash_exists("abc", "session") == "doc-1"
+        assert (
+            await self.store.check_hash_exists("def", "session", field="file_hash")
+            == "doc-1"
+        )
+        self.store.client.scroll.assert_not_called()
+
+    async def test_delete_forgets_hash(self):
+        """Test deleting a document drops its cached hashes."""
+        self.store._remember_hash("session", "content_hash", "abc", "doc-1")
+        self.store.client.scroll.return_value = ([], None)
+
+        await self.store.delete_document("doc-1", "session")
+
+        assert await self.store.check_hash_exists("abc", "session") is None